@@ -3,7 +3,12 @@ from typing import Dict, Any
 
 import sklearn
 
-from gama.genetic_programming.components import Primitive, Terminal, DATA_TERMINAL
+from gama.genetic_programming.components import (
+    Primitive,
+    PrimitiveSet,
+    Terminal,
+    DATA_TERMINAL,
+)
 
 
 def pset_from_config(configuration):
@@ -11,17 +16,20 @@ def pset_from_config(configuration):
 
     Given a configuration dictionary specifying operators (e.g. sklearn
     estimators), their hyperparameters and values for each hyperparameter,
-    create a gp.PrimitiveSetTyped that contains:
+    create a PrimitiveSet that contains:
 
         - For each operator a primitive
         - For each possible hyperparameter-value combination a unique terminal
 
+    The PrimitiveSet can also find Primitives and Terminals by their string,
+    which is used to parse pipeline strings.
+
     Side effect: Imports the classes of each primitive.
 
     Returns the given Pset.
     """
 
-    pset = defaultdict(list)
+    pset = PrimitiveSet()
     parameter_checks = {}
 
     # Make sure the str-keys are evaluated first, they describe shared hyperparameters.
@@ -1,7 +1,7 @@
 import shutil
 from abc import ABC
 from collections import defaultdict
-from functools import partial, partialmethod
+from functools import partial
 import logging
 import multiprocessing
 import os
@@ -33,6 +33,7 @@ import gama.genetic_programming.compilers.scikitlearn
 from gama.genetic_programming.components import Individual, Fitness
 from gama.search_methods.base_search import BaseSearch
 from gama.utilities.evaluation_library import EvaluationLibrary, Evaluation
+from gama.utilities.evaluation_store import EvaluationStore, dataset_fingerprint
 from gama.utilities.metrics import scoring_to_metric
 
 from gama.__version__ import __version__
@@ -54,13 +55,21 @@ from gama.genetic_programming.selection import (
 from gama.genetic_programming.operations import create_random_expression
 from gama.configuration.parser import pset_from_config
 from gama.genetic_programming.operator_set import OperatorSet
-from gama.genetic_programming.compilers.scikitlearn import compile_individual
+from gama.genetic_programming.compilers.scikitlearn import (
+    compile_individual,
+    precompute_folds,
+)
 from gama.postprocessing import (
     BestFitPostProcessing,
     BasePostProcessing,
     EnsemblePostProcessing,
 )
-from gama.utilities.generic.async_evaluator import AsyncEvaluator
+from gama.utilities.generic.async_evaluator import AsyncEvaluator, BaseEvaluator
+from gama.utilities.generic.bounded_cache import BoundedCache
+from gama.utilities.generic.in_process_evaluator import (
+    SerialEvaluator,
+    ThreadEvaluator,
+)
 from gama.utilities.metrics import Metric
 
 # Avoid stopit from logging warnings every time a pipeline evaluation times out
@@ -97,6 +106,8 @@ class Gama(ABC):
         post_processing: BasePostProcessing = BestFitPostProcessing(),
         output_directory: Optional[str] = None,
         store: str = "logs",
+        evaluation_store: Optional[Union[str, EvaluationStore]] = None,
+        executor: Optional[Union[str, Callable[..., BaseEvaluator]]] = None,
     ):
         """
 
@@ -166,6 +177,28 @@ class Gama(ABC):
              - 'models': keep only cache with models and predictions
              - 'logs': keep only the logs
              - 'all': keep logs and cache with models and predictions
+
+        evaluation_store: str or EvaluationStore, optional (default=None)
+            Path to a SQLite database in which evaluations are persisted across runs.
+            Pipelines which were already evaluated on the same data (with the same
+            scoring and cross-validation folds) are loaded instead of re-evaluated.
+            Only scores, errors and timing are stored, to also store the models
+            (e.g. to build ensembles from them) pass an `EvaluationStore` with
+            `store_models=True`. The database is not removed by `cleanup`.
+            If None, evaluations are not persisted.
+
+        executor: str or Callable, optional (default=None)
+            Determines how pipelines are evaluated during search:
+             - 'processes': on `n_jobs` subprocesses, see AsyncEvaluator
+             - 'threads': on `n_jobs` threads of the main process.
+               Only evaluates in parallel for estimators which release the GIL.
+             - 'serial': one at a time, in order, in the main process.
+               Avoids the overhead of sending pipelines and results to subprocesses.
+             - a callable which takes the keyword argument `defaults` and returns a
+               new BaseEvaluator, e.g. `functools.partial(RemoteEvaluator, ...)`
+            If None, 'processes' is used.
+            Memory limits and killing evaluations which ignore `max_eval_time`
+            are only supported for 'processes'.
         """
         if not output_directory:
             output_directory = f"gama_{str(uuid.uuid4())}"
@@ -203,20 +236,19 @@ class Gama(ABC):
             err = f"Expect None or positive int for max_eval_time, got {max_eval_time}."
         if n_jobs < -1 or n_jobs == 0:
             err = f"n_jobs should be -1 or positive int but is {n_jobs}."
+        executors = ["processes", "threads", "serial"]
+        if not callable(executor) and executor not in [None, *executors]:
+            err = f"executor should be callable or one of {executors}, is {executor}."
         if err:
             self.cleanup("all")
             raise ValueError(err)
 
-        setattr(
-            AsyncEvaluator,
-            "__init__",
-            partialmethod(
-                AsyncEvaluator.__init__,
-                n_workers=multiprocessing.cpu_count() if n_jobs is None else n_jobs,
-                memory_limit_mb=max_memory_mb,
-                logfile=os.path.join(self.output_directory, "memory.log"),
-            ),
-        )
+        n_workers = multiprocessing.cpu_count() if n_jobs == -1 else n_jobs
+        # Each worker keeps a cache of fitted pipeline prefixes, see `evaluate_pipeline`
+        if max_memory_mb is None:
+            self._prefix_cache_mb: float = 128
+        else:
+            self._prefix_cache_mb = 0.25 * max_memory_mb / (n_workers + 1)
 
         if max_eval_time is None:
             max_eval_time = round(0.1 * max_total_time)
@@ -227,6 +259,29 @@ class Gama(ABC):
             )
             max_eval_time = max_total_time
 
+        if executor is None:
+            executor = "processes"
+        elif executor in ["threads", "serial"]:
+            log.warning(
+                f"With executor '{executor}' evaluations run in the main process, "
+                "so `max_memory_mb` is not enforced and evaluations which exceed "
+                "`max_eval_time` can not be killed."
+            )
+        self._executor: Union[str, Callable[..., BaseEvaluator]] = executor
+        self._n_workers = n_workers
+        # Evaluations which ignore the soft timeout are abandoned or killed.
+        self._hard_timeout = 1.5 * max_eval_time + 10
+        self._process_evaluator_kwargs: Dict[str, Any] = dict(
+            n_workers=n_workers,
+            # Enforced by the monitor thread, which checks the memory in use.
+            # `worker_memory_limit_mb` is not set, as it also limits reserved memory.
+            memory_limit_mb=max_memory_mb,
+            logfile=os.path.join(self.output_directory, "memory.log"),
+            hard_timeout=self._hard_timeout,
+        )
+        # Keyword arguments shared by all evaluations, set in `_search_phase`.
+        self._evaluation_defaults: Dict[str, Any] = {}
+
         self._max_eval_time = max_eval_time
         self._time_manager = TimeKeeper(max_total_time)
         self._metrics: Tuple[Metric, ...] = scoring_to_metric(scoring)
@@ -282,6 +337,30 @@ class Gama(ABC):
             eliminate=eliminate_from_pareto,
             evaluate_callback=self._on_evaluation_completed,
             completed_evaluations=self._evaluation_library.lookup,
+            evaluation_store=(
+                EvaluationStore(evaluation_store)
+                if isinstance(evaluation_store, str)
+                else evaluation_store
+            ),
+            executor=self._create_executor,
+        )
+
+    def _create_executor(self) -> BaseEvaluator:
+        """ Create a new evaluator of the type set by the `executor` hyperparameter. """
+        if not isinstance(self._executor, str):
+            return self._executor(defaults=self._evaluation_defaults)
+        if self._executor == "processes":
+            return AsyncEvaluator(
+                defaults=self._evaluation_defaults, **self._process_evaluator_kwargs
+            )
+        if self._executor == "threads":
+            return ThreadEvaluator(
+                n_workers=self._n_workers,
+                hard_timeout=self._hard_timeout,
+                defaults=self._evaluation_defaults,
+            )
+        return SerialEvaluator(
+            hard_timeout=self._hard_timeout, defaults=self._evaluation_defaults
         )
 
     def cleanup(self, which="evaluations"):
@@ -573,18 +652,45 @@ class Gama(ABC):
 
         evaluate_pipeline = partial(
             gama.genetic_programming.compilers.scikitlearn.evaluate_pipeline,
+            metrics=self._metrics,
+        )
+        # The data is not bound to `evaluate_pipeline` but passed on by
+        # `evaluate_individual`, so the AsyncEvaluator can share it with memory-maps.
+        folds = precompute_folds(
+            self._y, is_classification=hasattr(self, "_label_encoder")
+        )
+        self._evaluation_defaults = dict(
+            evaluate_pipeline=evaluate_pipeline,
             x=self._x,
             y_train=self._y,
-            metrics=self._metrics,
+            prefix_cache=BoundedCache(self._prefix_cache_mb),
+            folds=folds,
         )
-        AsyncEvaluator.defaults = dict(evaluate_pipeline=evaluate_pipeline)
-
+        evaluation_store = self._operator_set.evaluation_store
+        if evaluation_store is not None:
+            evaluation_store.fingerprint = dataset_fingerprint(
+                self._x,
+                self._y,
+                folds,
+                extra=[m.name for m in self._metrics] + [str(self._regularize_length)],
+            )
+            # E.g. ensembles can not be built from evaluations of a BestFit run.
+            evaluation_store.requires_fitted = self._evaluation_library.keeps_fitted
+
+        estimators_directory = None
+        if self._executor == "processes" and self._evaluation_library.keeps_fitted:
+            # Fitted estimators are written to the cache by the subprocess which
+            # evaluated them, instead of being sent back to this process.
+            # Other executors share its memory or may not share its file system.
+            estimators_directory = os.path.join(self.output_directory, "cache")
         self._operator_set.evaluate = partial(
             gama.genetic_programming.compilers.scikitlearn.evaluate_individual,
             # evaluate_pipeline=evaluate_pipeline,
             timeout=self._max_eval_time,
             deadline=deadline,
             add_length_to_score=self._regularize_length,
+            keep_fitted=self._evaluation_library.keeps_fitted,
+            estimators_directory=estimators_directory,
         )
 
         try:
@@ -593,10 +699,16 @@ class Gama(ABC):
                 self._search_method.search(self._operator_set, start_candidates=pop)
         except KeyboardInterrupt:
             log.info("Search phase terminated because of Keyboard Interrupt.")
+        finally:
+            if evaluation_store is not None:
+                # Reopened if the store is used by a later search.
+                evaluation_store.close()
 
         self._final_pop = self._search_method.output
         n_evaluations = len(self._evaluation_library.evaluations)
         log.info(f"Search phase evaluated {n_evaluations} individuals.")
+        n_duplicates = self._operator_set.n_duplicates
+        log.info(f"Search phase did not re-evaluate {n_duplicates} duplicates.")
 
     def export_script(
         self, file: Optional[str] = "gama_pipeline.py", raise_if_exists: bool = False
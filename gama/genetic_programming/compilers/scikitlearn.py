@@ -2,14 +2,15 @@ from datetime import datetime
 import logging
 import os
 import time
-from typing import Callable, Tuple, Optional, Sequence
+from typing import Callable, Dict, Tuple, Optional, Sequence, List, Hashable
 
 import stopit
-from sklearn.base import TransformerMixin, is_classifier
-from sklearn.model_selection import ShuffleSplit, cross_validate, check_cv
+from sklearn.base import TransformerMixin, is_classifier, clone
+from sklearn.model_selection import ShuffleSplit, PredefinedSplit, check_cv
 from sklearn.pipeline import Pipeline
 
 from gama.utilities.evaluation_library import Evaluation
+from gama.utilities.generic.bounded_cache import BoundedCache
 from gama.utilities.generic.stopwatch import Stopwatch
 import numpy as np
 from gama.utilities.metrics import Metric
@@ -18,6 +19,17 @@ from gama.genetic_programming.components import Individual, PrimitiveNode, Fitne
 log = logging.getLogger(__name__)
 
 
+class EvaluationPruned(Exception):
+    """ Signals cross-validation was stopped early because of a low partial score.
+
+    `scores` holds the mean scores over the folds evaluated before stopping.
+    """
+
+    def __init__(self, message: str, scores: Tuple[float, ...]):
+        super().__init__(message)
+        self.scores = scores
+
+
 def primitive_node_to_sklearn(primitive_node: PrimitiveNode) -> object:
     hyperparameters = {
         terminal.output: terminal.value for terminal in primitive_node._terminals
@@ -49,11 +61,204 @@ def object_is_valid_pipeline(o):
     )
 
 
+def precompute_folds(y, cv: int = 5, is_classification: bool = True) -> np.ndarray:
+    """ Assign each sample of `y` to a test fold of `cv`-fold (stratified) CV.
+
+    The result can be passed as `folds` to `evaluate_pipeline`, so that the splits
+    are computed once instead of for each evaluation.
+
+    Returns
+    -------
+    np.ndarray
+        An integer array with for each sample the index of the fold it is tested in.
+    """
+    splitter = check_cv(cv, y, classifier=is_classification)
+    folds = np.empty(shape=(len(y),), dtype=np.min_scalar_type(cv - 1))
+    for i, (_, test) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        folds[test] = i
+    return folds
+
+
+def _step_key(step) -> str:
+    """ str: Identifies the configuration of a scikit-learn step, e.g. "PCA(...)". """
+    parameters = sorted(step.get_params(deep=False).items())
+    hyperparameters = ", ".join([f"{name}={value!r}" for name, value in parameters])
+    return f"{step.__class__.__name__}({hyperparameters})"
+
+
+def _fit_fold_with_cache(
+    pipeline: Pipeline,
+    x_train,
+    y_train,
+    x_test,
+    fold_key: Hashable,
+    prefix_cache: BoundedCache,
+) -> Tuple[Pipeline, Pipeline, object]:
+    """ Fit a clone of `pipeline` on the fold, reusing fitted prefixes of the cache.
+
+    The cache maps (prefix, fold) to the fitted transformers of the prefix and
+    the transformed train and test data of the fold.
+    Only the steps which follow the longest cached prefix are fit.
+
+    Returns
+    -------
+    Tuple
+        The fitted pipeline, its final step and the transformed test data.
+    """
+    names, steps = zip(*pipeline.steps)
+    prefix_keys: List[str] = []
+    for step in steps[:-1]:
+        previous = prefix_keys[-1] if prefix_keys else ""
+        prefix_keys.append(f"{previous}>{_step_key(step)}")
+
+    fitted: List = []
+    xt_train, xt_test = x_train, x_test
+    for n_cached in reversed(range(1, len(prefix_keys) + 1)):
+        cached = prefix_cache.get((prefix_keys[n_cached - 1], fold_key))
+        if cached is not None:
+            cached_fitted, xt_train, xt_test = cached
+            fitted = list(cached_fitted)
+            break
+
+    for step, prefix_key in zip(steps[len(fitted) : -1], prefix_keys[len(fitted) :]):
+        transformer = clone(step)
+        xt_train = transformer.fit_transform(xt_train, y_train)
+        xt_test = transformer.transform(xt_test)
+        fitted.append(transformer)
+        prefix_cache.put((prefix_key, fold_key), (tuple(fitted), xt_train, xt_test))
+
+    final_step = clone(steps[-1]).fit(xt_train, y_train)
+    estimator = Pipeline(list(zip(names, fitted + [final_step])))
+    return estimator, final_step, xt_test
+
+
+class _MemoizedPredictor:
+    """ Delegates to a fitted estimator, but calls each prediction method only once.
+
+    Scikit-learn scorers call e.g. `predict_proba(x)` on the estimator they score,
+    which allows all scorers and the out-of-fold predictions to share one call.
+    Only use it for predictions on a single dataset.
+    """
+
+    def __init__(self, estimator):
+        self._estimator = estimator
+        self._predictions: Dict[str, np.ndarray] = {}
+
+    def _predict_once(self, method: str, x) -> np.ndarray:
+        if method not in self._predictions:
+            self._predictions[method] = getattr(self._estimator, method)(x)
+        return self._predictions[method]
+
+    def predict(self, x) -> np.ndarray:
+        return self._predict_once("predict", x)
+
+    def predict_proba(self, x) -> np.ndarray:
+        return self._predict_once("predict_proba", x)
+
+    def decision_function(self, x) -> np.ndarray:
+        return self._predict_once("decision_function", x)
+
+    def __getattr__(self, name):
+        return getattr(self._estimator, name)
+
+
+def _cross_validate(
+    pipeline,
+    x,
+    y_train,
+    splits,
+    metrics: Tuple[Metric],
+    prefix_cache: Optional[BoundedCache] = None,
+    fold_key: Hashable = None,
+    prune_threshold: Optional[float] = None,
+    prune_min_folds: int = 1,
+) -> Tuple:
+    """ Cross-validate `pipeline`, fitting and predicting each fold only once.
+
+    If `prefix_cache` is provided, folds are fit with `_fit_fold_with_cache`.
+    If `prune_threshold` is provided, `EvaluationPruned` is raised as soon as
+    the mean score of the first metric over at least `prune_min_folds` folds
+    is below it.
+
+    Returns
+    -------
+    Tuple:
+        prediction: np.ndarray with the out-of-fold predictions
+        scores: tuple with the mean score over all folds for each metric
+        estimators: list of fitted pipelines, one for each fold
+    """
+    prediction, fold_scores, estimators = None, [], []
+    for i, (train, test) in enumerate(splits):
+        x_test, y_test = x.iloc[test, :], y_train.iloc[test]
+        if prefix_cache is not None:
+            estimator, final_step, xt_test = _fit_fold_with_cache(
+                pipeline,
+                x.iloc[train, :],
+                y_train.iloc[train],
+                x_test,
+                fold_key=(fold_key, i),
+                prefix_cache=prefix_cache,
+            )
+            # The final step can predict from the transformed data directly.
+            predictor, x_test = _MemoizedPredictor(final_step), xt_test
+        else:
+            estimator = clone(pipeline).fit(x.iloc[train, :], y_train.iloc[train])
+            predictor = _MemoizedPredictor(estimator)
+
+        if any([m.requires_probabilities for m in metrics]):
+            fold_pred = predictor.predict_proba(x_test)
+        else:
+            fold_pred = predictor.predict(x_test)
+        fold_scores.append([m.scorer(predictor, x_test, y_test) for m in metrics])
+        estimators.append(estimator)
+
+        if prediction is None:
+            if fold_pred.ndim == 2:
+                prediction = np.empty(shape=(len(y_train), fold_pred.shape[1]))
+            else:
+                prediction = np.empty(shape=(len(y_train),))
+        prediction[test] = fold_pred
+
+        can_prune = prune_min_folds <= len(fold_scores) < len(splits)
+        if prune_threshold is not None and can_prune:
+            partial_scores = tuple(np.mean(fold_scores, axis=0))
+            if partial_scores[0] < prune_threshold:
+                raise EvaluationPruned(
+                    f"Mean score {partial_scores[0]} over {len(fold_scores)} folds "
+                    f"is below the threshold {prune_threshold}.",
+                    partial_scores,
+                )
+    return prediction, tuple(np.mean(fold_scores, axis=0)), estimators
+
+
 def evaluate_pipeline(
-    pipeline, x, y_train, timeout: float, metrics: Tuple[Metric], cv=5, subsample=None,
+    pipeline,
+    x,
+    y_train,
+    timeout: float,
+    metrics: Tuple[Metric],
+    cv=5,
+    subsample=None,
+    prefix_cache: Optional[BoundedCache] = None,
+    folds: Optional[np.ndarray] = None,
+    prune_threshold: Optional[float] = None,
+    prune_min_folds: int = 1,
 ) -> Tuple:
     """ Score `pipeline` with k-fold CV according to `metrics` on (a subsample of) X, y
 
+    If `folds` is provided, it specifies the test fold of each sample
+    (see `precompute_folds`) and is used instead of `cv` when X is not subsampled.
+
+    If `prefix_cache` is provided and folds are deterministic (`cv` is an int),
+    the fitted transformers and transformed data of each fold are cached by the
+    configuration of the steps that lead up to it. Pipelines which share the start
+    of their pipeline, only need to fit the remainder.
+
+    If `prune_threshold` is provided, cross-validation stops as soon as the mean
+    score of the first metric over at least `prune_min_folds` folds is below it.
+    The error is then an `EvaluationPruned` and scores are those of the evaluated
+    folds.
+
     Returns
     -------
     Tuple:
@@ -73,45 +278,38 @@ def evaluate_pipeline(
 
     with stopit.ThreadingTimeout(timeout) as c_mgr:
         try:
-            if isinstance(subsample, int) and subsample < len(y_train):
+            subsampled = isinstance(subsample, int) and subsample < len(y_train)
+            if subsampled:
                 sampler = ShuffleSplit(n_splits=1, train_size=subsample, random_state=0)
                 idx, _ = next(sampler.split(x))
                 x, y_train = x.iloc[idx, :], y_train[idx]
 
-            splitter = check_cv(cv, y_train, is_classifier(pipeline))
-            result = cross_validate(
+            if folds is not None and not subsampled:
+                splitter = PredefinedSplit(folds)
+            else:
+                splitter = check_cv(cv, y_train, is_classifier(pipeline))
+            splits = list(splitter.split(x, y_train))
+
+            deterministic_folds = folds is not None or isinstance(cv, int)
+            use_cache = prefix_cache is not None and deterministic_folds
+            prediction, scores, estimators = _cross_validate(
                 pipeline,
                 x,
                 y_train,
-                cv=splitter,
-                return_estimator=True,
-                scoring=[m.name for m in metrics],
-                error_score="raise",
+                splits,
+                metrics,
+                prefix_cache=prefix_cache if use_cache else None,
+                fold_key=(cv, subsample if subsampled else None),
+                prune_threshold=prune_threshold,
+                prune_min_folds=prune_min_folds,
             )
-            scores = tuple([np.mean(result[f"test_{m.name}"]) for m in metrics])
-            estimators = result["estimator"]
-
-            for (estimator, (_, test)) in zip(estimators, splitter.split(x, y_train)):
-                if any([m.requires_probabilities for m in metrics]):
-                    fold_pred = estimator.predict_proba(x.iloc[test, :])
-                else:
-                    fold_pred = estimator.predict(x.iloc[test, :])
-
-                if prediction is None:
-                    if fold_pred.ndim == 2:
-                        prediction = np.empty(shape=(len(y_train), fold_pred.shape[1]))
-                    else:
-                        prediction = np.empty(shape=(len(y_train),))
-                prediction[test] = fold_pred
-
-            # prediction, scores, estimators = cross_val_predict_score(
-            #     pipeline, x, y_train, cv=cv, metrics=metrics
-            # )
         except stopit.TimeoutException:
             # This exception is handled by the ThreadingTimeout context manager.
             raise
         except KeyboardInterrupt:
             raise
+        except EvaluationPruned as e:
+            return prediction, e.scores, estimators, e
         except Exception as e:
             return prediction, scores, estimators, e
 
@@ -134,6 +332,8 @@ def evaluate_individual(
     timeout: float = 1e6,
     deadline: Optional[float] = None,
     add_length_to_score: bool = True,
+    keep_fitted: bool = True,
+    estimators_directory: Optional[str] = None,
     **kwargs,
 ) -> Evaluation:
     """ Evaluate the pipeline specified by individual, and record
@@ -154,6 +354,14 @@ def evaluate_individual(
         Cut off evaluation at `deadline` even if `timeout` seconds have not yet elapsed.
     add_length_to_score: bool (default=True)
         Add the length of the individual to the score result of the evaluation.
+    keep_fitted: bool (default=True)
+        If False, the fitted estimators and predictions are not returned,
+        e.g. because the EvaluationLibrary discards them.
+    estimators_directory: str, optional (default=None)
+        If set, the fitted estimators are written to a file in this directory
+        and the Evaluation only references it, see `Evaluation.estimators_to_disk`.
+        This avoids sending them from the worker to the main process, so the
+        directory must be shared with the main process, e.g. not on another machine.
     **kwargs: Dict, optional (default=None)
         Passed to `evaluate_pipeline` function.
 
@@ -161,6 +369,10 @@ def evaluate_individual(
     -------
     Evaluation
 
+    Raises
+    ------
+    OSError
+        If the estimators can not be written to `estimators_directory`.
     """
     result = Evaluation(individual, pid=os.getpid())
     result.start_time = datetime.now()
@@ -174,8 +386,15 @@ def evaluate_individual(
         result._predictions, result.score, result._estimators, error = evaluation
         if error is not None:
             result.error = f"{type(error)} {str(error)}"
+            result.pruned = isinstance(error, EvaluationPruned)
     result.duration = wall_time.elapsed_time
 
+    if not keep_fitted:
+        result._predictions, result._estimators = None, []
+    elif estimators_directory is not None and result.error is None:
+        # Not caught, as the evaluation would otherwise silently lose its estimators.
+        result.estimators_to_disk(estimators_directory)
+
     if add_length_to_score:
         result.score = result.score + (-len(individual.primitives),)
     individual.fitness = Fitness(
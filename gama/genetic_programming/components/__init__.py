@@ -18,6 +18,7 @@ Individuals are built with:
 from .primitive import Primitive
 from .terminal import Terminal, DATA_TERMINAL
 from .primitive_node import PrimitiveNode
+from .primitive_set import PrimitiveSet
 from .individual import Individual
 from .fitness import Fitness
 
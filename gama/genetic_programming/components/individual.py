@@ -1,5 +1,5 @@
 import uuid
-from typing import List, Callable, Optional, Dict, Any
+from typing import List, Callable, Optional, Dict, Any, Tuple
 
 from .fitness import Fitness
 from .primitive_node import PrimitiveNode
@@ -18,14 +18,18 @@ class Individual:
          If not provided, the `pipeline` property will be unavailable.
     """
 
+    # Many individuals are created during search, slots keep their footprint small.
+    __slots__ = ("fitness", "main_node", "_meta", "_id", "_to_pipeline", "_key")
+
     def __init__(
         self, main_node: PrimitiveNode, to_pipeline: Optional[Callable] = None
     ):
         self.fitness: Optional[Fitness] = None
         self.main_node = main_node
-        self.meta: Dict[str, Any] = dict()
+        self._meta: Optional[Dict[str, Any]] = None
         self._id = uuid.uuid4()
         self._to_pipeline = to_pipeline
+        self._key: Optional[Tuple] = None
 
     def __eq__(self, other):
         return isinstance(other, Individual) and other._id == self._id
@@ -39,6 +43,18 @@ class Individual:
             f"Pipeline: {self.pipeline_str()}\nFitness: {self.fitness}"
         )
 
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """ Dict: Information about the individual, e.g. its origin. """
+        if self._meta is None:
+            # Only allocated when used.
+            self._meta = dict()
+        return self._meta
+
+    @meta.setter
+    def meta(self, value: Dict[str, Any]):
+        self._meta = value
+
     @property
     def pipeline(self):
         """ Calls the `to_pipeline` method on itself."""
@@ -58,6 +74,21 @@ class Individual:
         """ str: e.g. "BernoulliNB(Binarizer(data, Binarizer.threshold=0.6), BernoulliNB.alpha=1.0)" """  # noqa: E501
         return str(self.main_node)
 
+    @property
+    def key(self) -> Tuple:
+        """ Tuple: Identifies the pipeline, equal only if `pipeline_str` is equal.
+
+        Unlike `pipeline_str`, the key is not rebuilt on each access.
+        Operations which change the individual in-place must call `invalidate_key`.
+        """
+        if self._key is None:
+            self._key = tuple(primitive.key for primitive in self.primitives)
+        return self._key
+
+    def invalidate_key(self):
+        """ Clear the cached `key`, must be called after in-place modification. """
+        self._key = None
+
     @property
     def primitives(self) -> List[PrimitiveNode]:
         """ Lists all primitive nodes, starting with the Individual's main node. """
@@ -88,7 +119,8 @@ class Individual:
             if scan_position + len(primitive._terminals) > position:
                 terminal_to_be_replaced = primitive._terminals[position - scan_position]
                 if terminal_to_be_replaced.identifier == new_terminal.identifier:
-                    primitive._terminals[position - scan_position] = new_terminal
+                    primitive.replace_terminal(position - scan_position, new_terminal)
+                    self.invalidate_key()
                     return
                 else:
                     raise ValueError(
@@ -130,6 +162,7 @@ class Individual:
             self.main_node = new_primitive
         else:
             last_primitive._data_node = new_primitive
+        self.invalidate_key()
 
     def copy_as_new(self):
         """ Make deep copy of self, but with fitness None and assigned a new id. """
@@ -1,6 +1,7 @@
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 from .terminal import DATA_TERMINAL, Terminal
 from .primitive import Primitive
+from .primitive_set import PrimitiveSet
 
 
 class PrimitiveNode:
@@ -16,6 +17,9 @@ class PrimitiveNode:
         A list of terminals matching the `primitive`.
     """
 
+    # Many nodes are created during search, slots keep their memory footprint small.
+    __slots__ = ("_primitive", "_data_node", "_terminals", "_key")
+
     def __init__(
         self,
         primitive: Primitive,
@@ -25,6 +29,7 @@ class PrimitiveNode:
         self._primitive = primitive
         self._data_node = data_node
         self._terminals = sorted(terminals, key=lambda t: str(t))
+        self._key: Optional[Tuple[str, Tuple[str, ...]]] = None
 
     def __str__(self):
         """ Recursively stringify all primitive nodes (primitive and hyperparameters).
@@ -49,17 +54,36 @@ class PrimitiveNode:
         terminal_str = ", ".join([str(terminal) for terminal in self._terminals])
         return f"{self._primitive}({terminal_str})"
 
+    @property
+    def key(self) -> Tuple[str, Tuple[str, ...]]:
+        """ Tuple: Identifies the primitive and hyperparameters, without data node. """
+        if self._key is None:
+            self._key = (str(self._primitive), tuple(map(repr, self._terminals)))
+        return self._key
+
+    def replace_terminal(self, position: int, new_terminal: Terminal):
+        """ Replace the terminal at `position` in `_terminals` by `new_terminal`. """
+        self._terminals[position] = new_terminal
+        self._key = None
+
     def copy(self):
         """ Copies the object. Shallow for terminals, deep for data_node. """
-        if self._data_node == DATA_TERMINAL:
-            data_node_copy = DATA_TERMINAL
-        else:
-            data_node_copy = self._data_node.copy()
-        return PrimitiveNode(
-            primitive=self._primitive,
-            data_node=data_node_copy,
-            terminals=self._terminals.copy(),
-        )
+        nodes = []
+        node: Union[PrimitiveNode, str] = self
+        while isinstance(node, PrimitiveNode):
+            nodes.append(node)
+            node = node._data_node
+
+        # Copy from the data terminal up, terminals are already sorted.
+        copy: Union[PrimitiveNode, str] = node
+        for node in reversed(nodes):
+            new_node = PrimitiveNode.__new__(PrimitiveNode)
+            new_node._primitive = node._primitive
+            new_node._data_node = copy
+            new_node._terminals = node._terminals.copy()
+            new_node._key = node._key
+            copy = new_node
+        return copy
 
     @classmethod
     def from_string(cls, string: str, primitive_set: dict):
@@ -106,17 +130,26 @@ class PrimitiveNode:
 
 def find_primitive(primitive_set: dict, primitive_string: str) -> Primitive:
     """ Find the Primitive that matches `primitive_string` in `primitive_set`. """
-    all_primitives = primitive_set[DATA_TERMINAL] + primitive_set["prediction"]
-    for primitive in all_primitives:
-        if repr(primitive) == primitive_string:
-            return primitive
-    raise IndexError(f"Could not find Primitive of type '{primitive_string}'.")
+    found: Optional[Primitive] = None
+    if isinstance(primitive_set, PrimitiveSet):
+        found = primitive_set.find_primitive(primitive_string)
+    else:
+        all_primitives = primitive_set[DATA_TERMINAL] + primitive_set["prediction"]
+        found = next((p for p in all_primitives if repr(p) == primitive_string), None)
+    if found is None:
+        raise ValueError(f"Could not find Primitive of type '{primitive_string}'.")
+    return found
 
 
 def find_terminal(primitive_set: dict, terminal_string: str) -> Terminal:
     """ Find the Terminal that matches `terminal_string` in `primitive_set`. """
-    term_type, _ = terminal_string.split("=")
-    for terminal in primitive_set[term_type]:
-        if repr(terminal) == terminal_string:
-            return terminal
-    raise RuntimeError(f"Could not find Terminal of type '{terminal_string}'.")
+    found: Optional[Terminal] = None
+    if isinstance(primitive_set, PrimitiveSet):
+        found = primitive_set.find_terminal(terminal_string)
+    else:
+        term_type, _ = terminal_string.split("=")
+        terminals = primitive_set[term_type]
+        found = next((t for t in terminals if repr(t) == terminal_string), None)
+    if found is None:
+        raise ValueError(f"Could not find Terminal of type '{terminal_string}'.")
+    return found
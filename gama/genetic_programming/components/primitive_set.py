@@ -0,0 +1,69 @@
+from collections import defaultdict
+from typing import Dict, Optional
+
+from .primitive import Primitive
+from .terminal import DATA_TERMINAL, Terminal
+
+
+class PrimitiveSet(defaultdict):
+    """ Maps output types to Primitives and Terminals, with lookups by string.
+
+    Behaves like the `defaultdict(list)` which maps an output type
+    (e.g. "data", "prediction" or a hyperparameter) to the Primitives or Terminals
+    that produce it. Additionally allows O(1) lookup of a Primitive by its `repr`,
+    and of a Terminal by its `repr`, e.g. for parsing pipeline strings.
+
+    The lookup tables are built on first use, and rebuilt after any key is
+    (re)assigned or deleted. Modifying a list of the set in-place after a lookup
+    requires a call to `clear_index`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(list, *args, **kwargs)
+        self._primitives_by_repr: Optional[Dict[str, Primitive]] = None
+        self._terminals_by_repr: Optional[Dict[str, Terminal]] = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.clear_index()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.clear_index()
+
+    # defaultdict's copy and pickle support pass `default_factory` to `__init__`.
+    def __copy__(self):
+        return self.__class__(self)
+
+    def __reduce__(self):
+        return self.__class__, (), None, None, iter(self.items())
+
+    def clear_index(self):
+        """ Clear the lookup tables, they are rebuilt on the next lookup. """
+        self._primitives_by_repr = None
+        self._terminals_by_repr = None
+
+    def _build_index(self):
+        self._primitives_by_repr = {
+            repr(primitive): primitive
+            for output in [DATA_TERMINAL, "prediction"]
+            for primitive in self.get(output, [])
+        }
+        self._terminals_by_repr = {
+            repr(terminal): terminal
+            for output, terminals in self.items()
+            if output not in [DATA_TERMINAL, "prediction"]
+            for terminal in terminals
+        }
+
+    def find_primitive(self, primitive_string: str) -> Optional[Primitive]:
+        """ Return the Primitive with `repr` `primitive_string`, None if not found. """
+        if self._primitives_by_repr is None:
+            self._build_index()
+        return self._primitives_by_repr.get(primitive_string)  # type: ignore
+
+    def find_terminal(self, terminal_string: str) -> Optional[Terminal]:
+        """ Return the Terminal with `repr` `terminal_string`, None if not found. """
+        if self._terminals_by_repr is None:
+            self._build_index()
+        return self._terminals_by_repr.get(terminal_string)  # type: ignore
@@ -57,6 +57,8 @@ def crossover_primitives(
     p1_node = random.choice(list(ind1.primitives)[:-1])
     p2_node = random.choice(list(ind2.primitives)[:-1])
     p1_node._data_node, p2_node._data_node = p2_node._data_node, p1_node._data_node
+    ind1.invalidate_key()
+    ind2.invalidate_key()
     return ind1, ind2
 
 
@@ -93,6 +93,7 @@ def mut_shrink(
         current_primitive_node = cast(PrimitiveNode, current_primitive_node._data_node)
         primitives_left -= 1
     current_primitive_node._data_node = DATA_TERMINAL
+    individual.invalidate_key()
 
 
 def mut_insert(individual: Individual, primitive_set: dict) -> None:
@@ -112,6 +113,7 @@ def mut_insert(individual: Individual, primitive_set: dict) -> None:
     )
     new_primitive_node._data_node = parent_node._data_node
     parent_node._data_node = new_primitive_node
+    individual.invalidate_key()
 
 
 def random_valid_mutation_in_place(
@@ -4,10 +4,11 @@ Deb, K., Pratap, A., Agarwal, S., & Meyarivan, T. A. M. T. (2002).
 A fast and elitist multiobjective genetic algorithm: NSGA-II.
 IEEE transactions on evolutionary computation, 6(2), 182-197.
 """
+from collections.abc import Sequence
 import itertools
 import random
 from functools import cmp_to_key
-from typing import List, Any, Callable
+from typing import List, Any, Callable, Tuple, Dict, Iterable
 import numpy as np
 
 
@@ -35,31 +36,66 @@ class NSGAMeta:
 
 
 def nsga2_select(
-    population: List[Any], n: int, metrics: List[Callable[[Any], float]]
+    population: List[Any],
+    n: int,
+    metrics: List[Callable[[Any], float]],
+    vectorized: bool = True,
 ) -> List[Any]:
     """ Select n pairs from the population.
 
      Selection is done through binary tournament selection based on crowding distance.
      Parent pairs may be repeated, but each parent pair consists of two unique parents.
      The population must be at least size 3 (otherwise it is trivial or impossible).
+     If `vectorized`, ranks and crowding distances are computed with numpy,
+     which is considerably faster for large populations.
+     If `population` is a `RankedPopulation`, its maintained ranks and crowding
+     distances are used instead, and `metrics` is ignored.
     """
     if len(population) < 3:
         raise ValueError("population must be at least size 3 for a pair to be selected")
 
-    # Entire population is returned, but with rank and distance information.
-    candidates = nsga2(population, n=len(population), metrics=metrics, return_meta=True)
+    if not vectorized and not isinstance(population, RankedPopulation):
+        # Entire population is returned, but with rank and distance information.
+        candidates = nsga2(
+            population, n=len(population), metrics=metrics, return_meta=True
+        )
+
+        def select_one(exclude=None):
+            selected = random.sample(candidates, k=3)
+            ind1, ind2 = [s for s in selected if s != exclude][:2]
+            return ind1 if ind1.crowd_compare(ind2) < 0 else ind2
+
+        selected = []
+        for _ in range(n):
+            first = select_one()
+            second = select_one(exclude=first)
+            selected.append((first.obj, second.obj))
+        return selected
 
-    def select_one(exclude=None):
-        selected = random.sample(candidates, k=3)
-        ind1, ind2 = [s for s in selected if s != exclude][:2]
-        return ind1 if ind1.crowd_compare(ind2) < 0 else ind2
+    if isinstance(population, RankedPopulation):
 
-    selected = []
+        def crowd_key(i):
+            item = population[i]
+            return population.rank(item), -population.distance(item)
+
+    else:
+        ranks, distances = rank_and_crowding_distance(_values(population, metrics))
+
+        def crowd_key(i):
+            return ranks[i], -distances[i]
+
+    def select_index(exclude=None):
+        # Favor lower rank, if equal, favor less crowded.
+        selected = random.sample(range(len(population)), k=3)
+        i, j = [s for s in selected if s != exclude][:2]
+        return i if crowd_key(i) < crowd_key(j) else j
+
+    selected_pairs = []
     for _ in range(n):
-        first = select_one()
-        second = select_one(exclude=first)
-        selected.append((first.obj, second.obj))
-    return selected
+        first = select_index()
+        second = select_index(exclude=first)
+        selected_pairs.append((population[first], population[second]))
+    return selected_pairs
 
 
 def nsga2(
@@ -67,6 +103,7 @@ def nsga2(
     n: int,
     metrics: List[Callable[[Any], float]],
     return_meta: bool = False,
+    vectorized: bool = True,
 ) -> List[Any]:
     """ Selects n individuals from the population for offspring according to NSGA-II.
 
@@ -84,6 +121,9 @@ def nsga2(
         If True, return the selected individuals wrapped in a NSGAMeta class,
         with information such as rank and distance.
         If False, return the selected individuals as they were passed to this function.
+    vectorized: bool (default=True)
+        If True, compute ranks and crowding distances with numpy instead of
+        `fast_non_dominated_sort` and `crowding_distance_assignment`.
 
     Returns
     -------
@@ -92,6 +132,19 @@ def nsga2(
     """
     if n == 0 or n > len(population):
         raise ValueError(f"n is {n} must be 0 < n < len(population)={len(population)}")
+    if vectorized:
+        ranks, distances = rank_and_crowding_distance(_values(population, metrics))
+        # Favor lower rank, if equal, favor less crowded.
+        order = np.lexsort((-distances, ranks))[:n]
+        if not return_meta:
+            return [population[i] for i in order]
+        selected_meta = []
+        for i in order:
+            meta = NSGAMeta(population[i], metrics)
+            meta.rank, meta.distance = ranks[i], distances[i]
+            selected_meta.append(meta)
+        return selected_meta
+
     population = [NSGAMeta(p, metrics) for p in population]
     selection: List[NSGAMeta] = []
     fronts = fast_non_dominated_sort(population)
@@ -134,7 +187,7 @@ def fast_non_dominated_sort(P: List[NSGAMeta]) -> List[List[NSGAMeta]]:
             for q in p.dominating:
                 q.domination_counter -= 1
                 if q.domination_counter == 0:
-                    q.rank = i + 1
+                    q.rank = i + 2  # Ranks start from 1, front `i + 1` is next.
                     fronts[i + 1].append(q)
         i += 1
     return fronts
@@ -159,3 +212,202 @@ def crowding_distance_assignment(I: List[NSGAMeta]) -> None:
             i.distance += (i_next.values[m] - i_prev.values[m]) / (
                 I[-1].values[m] - I[0].values[m]
             )
+
+
+def _values(population: List[Any], metrics: List[Callable[[Any], float]]):
+    """ np.ndarray: The value of each metric (column) for each object (row). """
+    return np.array([[m(p) for m in metrics] for p in population], dtype=float)
+
+
+def dominance_matrix(values: np.ndarray) -> np.ndarray:
+    """ Boolean matrix where [i, j] is True if row i of `values` dominates row j.
+
+    Like `NSGAMeta.dominates`, a row dominates another if all its values are larger.
+    """
+    dominates = np.ones((len(values), len(values)), dtype=bool)
+    for column in values.T:
+        dominates &= column[:, np.newaxis] > column[np.newaxis, :]
+    return dominates
+
+
+def non_dominated_ranks(values: np.ndarray) -> np.ndarray:
+    """ Vectorized non-dominated sort, returns the Pareto front (from 1) of rows. """
+    dominates = dominance_matrix(values)
+    n_dominated_by = dominates.sum(axis=0)
+    ranks = np.zeros(len(values), dtype=int)
+    front = np.flatnonzero(n_dominated_by == 0)
+    rank = 1
+    while front.size > 0:
+        ranks[front] = rank
+        n_dominated_by -= dominates[front].sum(axis=0)
+        n_dominated_by[front] = -1  # Exclude from later fronts.
+        front = np.flatnonzero(n_dominated_by == 0)
+        rank += 1
+    return ranks
+
+
+def crowding_distances(values: np.ndarray) -> np.ndarray:
+    """ Vectorized `crowding_distance_assignment` for the rows of a single front. """
+    distances = np.zeros(len(values))
+    for m in range(values.shape[1]):
+        order = np.argsort(values[:, m], kind="stable")
+        sorted_values = values[order, m]
+        distances[order[0]] = distances[order[-1]] = float("inf")
+        low, high = sorted_values[0], sorted_values[-1]
+        if high == low or np.isinf(low) or np.isinf(high):
+            # See `crowding_distance_assignment`.
+            continue
+        distances[order[1:-1]] += (sorted_values[2:] - sorted_values[:-2]) / (
+            high - low
+        )
+    return distances
+
+
+def rank_and_crowding_distance(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Compute the Pareto front rank and within front crowding distance of rows. """
+    ranks = non_dominated_ranks(values)
+    distances = np.zeros(len(values))
+    for rank in np.unique(ranks):
+        in_front = ranks == rank
+        distances[in_front] = crowding_distances(values[in_front])
+    return ranks, distances
+
+
+class RankedPopulation(Sequence):
+    """ A population which maintains its Pareto fronts and crowding distances.
+
+    Items are added and removed one at a time, and each change only updates the
+    fronts it affects (following the efficient non-dominated level update of
+    Li et al. (2016)), instead of sorting the entire population again.
+    As with `NSGAMeta.dominates`, an item dominates another if all its values are
+    larger, so items are ranked the same as by `nsga2`.
+
+    Li, K., Deb, K., Zhang, Q., & Zhang, Q. (2016).
+    Efficient nondomination level update method for steady-state evolutionary
+    multiobjective optimization. IEEE transactions on cybernetics, 47(9), 2838-2849.
+    """
+
+    def __init__(
+        self, get_values_fn: Callable[[Any], Tuple[float, ...]], items: Iterable = ()
+    ):
+        """
+        Parameters
+        ----------
+        get_values_fn: Callable[[T], Tuple[float, ...]]
+            Function which returns the values of an item, each should be maximized.
+        items: Iterable[T] (default=())
+            Items to add to the population.
+        """
+        self._get_values_fn = get_values_fn
+        self._items: List[Any] = []
+        self._position: Dict[Any, int] = {}
+        self._values: Dict[Any, Tuple[float, ...]] = {}
+        self._rank: Dict[Any, int] = {}
+        self._distance: Dict[Any, float] = {}
+        # The Pareto fronts, from best (rank 1) to worst.
+        self.fronts: List[List[Any]] = []
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, item):
+        return item in self._position
+
+    def rank(self, item) -> int:
+        """ The Pareto front of `item`, starting from 1. """
+        return self._rank[item]
+
+    def distance(self, item) -> float:
+        """ The crowding distance of `item` within its Pareto front. """
+        return self._distance[item]
+
+    def _dominates(self, item, other) -> bool:
+        values, other_values = self._values[item], self._values[other]
+        return all(
+            value > other_value for value, other_value in zip(values, other_values)
+        )
+
+    def _dominated_by_any(self, item, others: Iterable) -> bool:
+        return any(self._dominates(other, item) for other in others)
+
+    def _update_crowding_distances(self, front: List[Any]):
+        if not front:
+            return
+        distances = crowding_distances(np.array([self._values[i] for i in front]))
+        for item, distance in zip(front, distances):
+            self._distance[item] = distance
+
+    def add(self, item):
+        """ Add `item` to the population, updating the fronts it dominates. """
+        self._values[item] = tuple(self._get_values_fn(item))
+        self._position[item] = len(self._items)
+        self._items.append(item)
+
+        # If a front has a member which dominates `item`, so do all fronts before it.
+        low, high = 0, len(self.fronts)
+        while low < high:
+            middle = (low + high) // 2
+            if self._dominated_by_any(item, self.fronts[middle]):
+                low = middle + 1
+            else:
+                high = middle
+
+        # Members dominated by the items moved into a front are moved to the next.
+        moved, rank = [item], low
+        while moved:
+            if rank == len(self.fronts):
+                self.fronts.append([])
+            front = self.fronts[rank]
+            pushed = [q for q in front if self._dominated_by_any(q, moved)]
+            if pushed:
+                pushed_set = set(pushed)
+                front[:] = [q for q in front if q not in pushed_set]
+            front.extend(moved)
+            for q in moved:
+                self._rank[q] = rank + 1
+            self._update_crowding_distances(front)
+            moved, rank = pushed, rank + 1
+
+    def remove(self, item):
+        """ Remove `item` from the population, updating the fronts it dominated. """
+        position = self._position.pop(item)
+        last = self._items.pop()
+        if last is not item:
+            self._items[position] = last
+            self._position[last] = position
+
+        rank = self._rank.pop(item) - 1
+        self.fronts[rank].remove(item)
+        # Members of the next front which were only dominated by the items which
+        # left a front are moved up into it.
+        left = [item]
+        while left and rank + 1 < len(self.fronts):
+            front, next_front = self.fronts[rank], self.fronts[rank + 1]
+            moved = [
+                q
+                for q in next_front
+                if self._dominated_by_any(q, left)
+                and not self._dominated_by_any(q, front)
+            ]
+            front.extend(moved)
+            if moved:
+                moved_set = set(moved)
+                next_front[:] = [q for q in next_front if q not in moved_set]
+            for q in moved:
+                self._rank[q] = rank + 1
+            self._update_crowding_distances(front)
+            left, rank = moved, rank + 1
+        self._update_crowding_distances(self.fronts[rank])
+
+        while self.fronts and not self.fronts[-1]:
+            self.fronts.pop()
+        del self._values[item]
+        del self._distance[item]
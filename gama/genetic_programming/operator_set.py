@@ -1,6 +1,16 @@
+from collections import deque
 import logging
+import os
+from typing import Callable, Deque, List, Optional, Set
+import uuid
 
 from .components import Individual
+from gama.utilities.evaluation_library import Evaluation
+from gama.utilities.generic.async_evaluator import (
+    AsyncEvaluator,
+    AsyncFuture,
+    BaseEvaluator,
+)
 
 log = logging.getLogger(__name__)
 
@@ -19,6 +29,8 @@ class OperatorSet:
         evaluate_callback,
         max_retry=50,
         completed_evaluations=None,
+        evaluation_store=None,
+        executor: Optional[Callable[[], BaseEvaluator]] = None,
     ):
         """
 
@@ -26,6 +38,8 @@ class OperatorSet:
         :param mate:
         :param create:
         :param create_new:
+        :param executor: creates the evaluator which search methods submit to,
+            an AsyncEvaluator with its default settings if None.
         """
 
         self._mutate = mutate
@@ -33,19 +47,98 @@ class OperatorSet:
         self._create_from_population = create_from_population
         self._create_new = create_new
         self._compile = compile_
-        self._safe_compile = None
+        self._safe_compile: Optional[Callable] = None
         self._eliminate = eliminate
         self._max_retry = max_retry
-        self._evaluate = None
+        self._evaluate: Optional[Callable] = None
         self._evaluate_callback = evaluate_callback
-        self.evaluate = None
+        self.evaluate: Optional[Callable[..., Evaluation]] = None
 
         self._completed_evaluations = completed_evaluations
+        # An EvaluationStore with evaluations of previous runs, see `submit`.
+        self.evaluation_store = evaluation_store
+        self._resolved_futures: Deque[AsyncFuture] = deque()
+        self._to_store: Set[uuid.UUID] = set()
+        self._duplicates: Set[uuid.UUID] = set()
+        # Number of duplicate pipelines which were not re-evaluated, see `submit`.
+        self.n_duplicates = 0
+        self._executor: Callable[[], BaseEvaluator] = AsyncEvaluator
+        if executor is not None:
+            self._executor = executor
+
+    def executor(self) -> BaseEvaluator:
+        """ Create a new evaluator, to be used as context manager by a search. """
+        return self._executor()
+
+    def submit(self, async_evaluator, individual: Individual, **kwargs):
+        """ Submit the evaluation of `individual`, unless it can be loaded instead.
+
+        Evaluations found in the `evaluation_store` are not submitted,
+        but are returned by `wait_next` as if they were evaluated.
+        Other evaluations are added to the store when completed.
+        Pipelines which were already evaluated during this run (e.g. because
+        `try_until_new` did not find a new individual) are not submitted either.
+        They get the result of the earlier evaluation, but are not passed to the
+        `evaluate_callback`, as they are not new evaluations.
+        """
+        duplicate_of = self._completed_evaluations.get(individual.key)
+        if duplicate_of is not None:
+            individual.fitness = duplicate_of.individual.fitness
+            future = AsyncFuture(self.evaluate, individual, **kwargs)
+            future.result = Evaluation(
+                individual,
+                score=duplicate_of.score,
+                start_time=duplicate_of.start_time,
+                duration=duplicate_of.duration,
+                error=duplicate_of.error,
+                pid=os.getpid(),
+                pruned=duplicate_of.pruned,
+            )
+            self._duplicates.add(future.id)
+            self._resolved_futures.append(future)
+            return future
+
+        if self.evaluation_store is not None:
+            evaluation = self.evaluation_store.load(individual)
+            if evaluation is not None:
+                future = AsyncFuture(self.evaluate, individual, **kwargs)
+                future.result = evaluation
+                self._resolved_futures.append(future)
+                return future
+        future = async_evaluator.submit(self.evaluate, individual, **kwargs)
+        if self.evaluation_store is not None:
+            self._to_store.add(future.id)
+        return future
 
     def wait_next(self, async_evaluator):
-        future = async_evaluator.wait_next()
+        if self._resolved_futures:
+            future = self._resolved_futures.popleft()
+            if future.id in self._duplicates:
+                self._duplicates.remove(future.id)
+                self.n_duplicates += 1
+                return future
+        else:
+            future = async_evaluator.wait_next()
+        return self._complete(future)
+
+    def wait_completed(self, async_evaluator) -> List[AsyncFuture]:
+        """ Wait for the next future, then return it with all others completed. """
+        futures = [self.wait_next(async_evaluator)]
+        while self._resolved_futures:
+            futures.append(self.wait_next(async_evaluator))
+        if async_evaluator is not None:
+            futures.extend(map(self._complete, async_evaluator.completed_futures()))
+        return futures
+
+    def _complete(self, future: AsyncFuture) -> AsyncFuture:
+        """ Store and report the result of a completed future. """
+        should_store = future.id in self._to_store
+        self._to_store.discard(future.id)
         if future.result is not None:
             evaluation = future.result
+            if should_store:
+                # Store before the callback, which may move data to disk.
+                self.evaluation_store.save(evaluation)
             if self._evaluate_callback is not None:
                 self._evaluate_callback(evaluation)
 
@@ -56,13 +149,19 @@ class OperatorSet:
     def try_until_new(self, operator, *args, **kwargs):
         for _ in range(self._max_retry):
             individual = operator(*args, **kwargs)
-            if str(individual.main_node) not in self._completed_evaluations:
+            if not self._is_evaluated(individual):
                 return individual
         else:
             log.debug(f"50 iterations of {operator.__name__} did not yield new ind.")
             # For progress on solving this, see #11
             return individual
 
+    def _is_evaluated(self, individual: Individual) -> bool:
+        """ True if `individual`'s pipeline was evaluated in this or a past run. """
+        if individual.key in self._completed_evaluations:
+            return True
+        return self.evaluation_store is not None and individual in self.evaluation_store
+
     def mate(self, ind1: Individual, ind2: Individual, *args, **kwargs):
         def mate_with_log():
             new_individual1, new_individual2 = ind1.copy_as_new(), ind2.copy_as_new()
@@ -9,7 +9,6 @@ import stopit
 from gama.genetic_programming.operator_set import OperatorSet
 from gama.logging.evaluation_logger import EvaluationLogger
 from gama.search_methods.base_search import BaseSearch
-from gama.utilities.generic.async_evaluator import AsyncEvaluator
 from gama.genetic_programming.components.individual import Individual
 
 log = logging.getLogger(__name__)
@@ -147,7 +146,7 @@ def asha(
             return operations.individual(), minimum_early_stopping_rate
 
     try:
-        with AsyncEvaluator() as async_:
+        with operations.executor() as async_:
             log.info("ASHA start")
 
             def start_new_job():
@@ -161,7 +160,7 @@ def asha(
                     timeout=(10 + (time_penalty * 600)),
                 )
 
-            for _ in range(8):
+            for _ in range(async_.queue_depth):
                 start_new_job()
 
             while (max_full_evaluations is None) or (
@@ -173,7 +172,8 @@ def asha(
                     loss = future.result.score[0]
                     individual = future.result.individual
                     rung_individuals[rung].append((loss, individual))
-                start_new_job()
+                while async_.n_queued < async_.queue_depth:
+                    start_new_job()
 
             highest_rung_reached = max(rungs)
     except stopit.TimeoutException:
@@ -1,14 +1,15 @@
 import logging
 from functools import partial
+import math
 from typing import Optional, Any, Tuple, Dict, List, Callable
 
 import pandas as pd
 
 from gama.genetic_programming.components import Individual
+from gama.genetic_programming.nsga2 import RankedPopulation
 from gama.genetic_programming.operator_set import OperatorSet
 from gama.logging.evaluation_logger import EvaluationLogger
 from gama.search_methods.base_search import BaseSearch
-from gama.utilities.generic.async_evaluator import AsyncEvaluator
 
 log = logging.getLogger(__name__)
 
@@ -27,6 +28,20 @@ class AsyncEA(BaseSearch):
 
     restart_callback: Callable[[], bool], optional (default=None)
         Function which takes no arguments and returns True if search restart.
+
+    prune_evaluations: bool, optional (default=False)
+        If True, stop the evaluation of a new individual after its first fold if its
+        score is far below the worst score of the (full) population, see
+        `prune_margin`. Pruned individuals do not enter the population.
+
+    prune_margin: float, optional (default=0.1)
+        An evaluation is pruned if its partial score is more than `prune_margin`
+        times the absolute worst score below the worst score of the population.
+
+    queue_depth: int, optional (default=None)
+        All completed evaluations are processed at once, after which a batch of
+        offspring is created to keep `queue_depth` evaluations queued or running.
+        If None, the `queue_depth` of the evaluator is used.
     """
 
     def __init__(
@@ -34,6 +49,9 @@ class AsyncEA(BaseSearch):
         population_size: Optional[int] = None,
         max_n_evaluations: Optional[int] = None,
         restart_callback: Optional[Callable[[], bool]] = None,
+        prune_evaluations: Optional[bool] = None,
+        prune_margin: Optional[float] = None,
+        queue_depth: Optional[int] = None,
     ):
         super().__init__()
         # maps hyperparameter -> (set value, default)
@@ -41,6 +59,9 @@ class AsyncEA(BaseSearch):
             population_size=(population_size, 50),
             restart_callback=(restart_callback, None),
             max_n_evaluations=(max_n_evaluations, None),
+            prune_evaluations=(prune_evaluations, False),
+            prune_margin=(prune_margin, 0.1),
+            queue_depth=(queue_depth, None),
         )
         self.output = []
 
@@ -56,6 +77,7 @@ class AsyncEA(BaseSearch):
                 parent0=partial(get_parent, n=0),
                 parent1=partial(get_parent, n=1),
                 origin=lambda e: e.individual.meta.get("origin", "unknown"),
+                pruned=lambda e: str(e.pruned),
             ),
         )
 
@@ -75,6 +97,9 @@ def async_ea(
     restart_callback: Optional[Callable[[], bool]] = None,
     max_n_evaluations: Optional[int] = None,
     population_size: int = 50,
+    prune_evaluations: bool = False,
+    prune_margin: float = 0.1,
+    queue_depth: Optional[int] = None,
 ) -> List[Individual]:
     """ Perform asynchronous evolutionary optimization with given operators.
 
@@ -93,6 +118,17 @@ def async_ea(
         If None, the algorithm will be run indefinitely.
     population_size: int (default=50)
         Maximum number of individuals in the population at any time.
+    prune_evaluations: bool (default=False)
+        If True, stop the evaluation of a new individual after its first fold if its
+        score is far below the worst score of the (full) population, see
+        `prune_margin`. Pruned individuals do not enter the population.
+    prune_margin: float (default=0.1)
+        An evaluation is pruned if its partial score is more than `prune_margin`
+        times the absolute worst score below the worst score of the population.
+    queue_depth: int, optional (default=None)
+        All completed evaluations are processed at once, after which a batch of
+        offspring is created to keep `queue_depth` evaluations queued or running.
+        If None, the `queue_depth` of the evaluator is used.
 
     Returns
     -------
@@ -103,41 +139,77 @@ def async_ea(
         raise ValueError(
             f"n_evaluations must be non-negative or None, is {max_n_evaluations}."
         )
+    if queue_depth is not None and queue_depth <= 0:
+        raise ValueError(f"queue_depth must be positive or None, is {queue_depth}.")
 
     max_pop_size = population_size
 
     current_population = output
     n_evaluated_individuals = 0
 
-    with AsyncEvaluator() as async_:
+    with ops.executor() as async_:
         should_restart = True
         while should_restart:
             should_restart = False
             current_population[:] = []
+            # Keeps Pareto fronts up to date for selection and elimination.
+            # Ranked on the objectives used for selection by `create_from_population`.
+            ranked_population = RankedPopulation(lambda ind: ind.fitness.values[:2])
             log.info("Starting EA with new population.")
             for individual in start_candidates:
-                async_.submit(ops.evaluate, individual)
+                ops.submit(async_, individual)
 
             while (max_n_evaluations is None) or (
                 n_evaluated_individuals < max_n_evaluations
             ):
-                future = ops.wait_next(async_)
-                if future.exception is None:
-                    individual = future.result.individual
-                    current_population.append(individual)
-                    if len(current_population) > max_pop_size:
-                        to_remove = ops.eliminate(current_population, 1)
-                        current_population.remove(to_remove[0])
-
-                if len(current_population) > 2:
-                    new_individual = ops.create(current_population, 1)[0]
-                    async_.submit(ops.evaluate, new_individual)
+                futures = ops.wait_completed(async_)
+
+                for future in futures:
+                    # Pruned individuals only have scores for some folds.
+                    if future.exception is None and not future.result.pruned:
+                        individual = future.result.individual
+                        current_population.append(individual)
+                        ranked_population.add(individual)
+                while len(current_population) > max_pop_size:
+                    to_remove = ops.eliminate(ranked_population, 1)
+                    current_population.remove(to_remove[0])
+                    ranked_population.remove(to_remove[0])
+
+                n_offspring = (queue_depth or async_.queue_depth) - async_.n_queued
+                if len(current_population) > 2 and n_offspring > 0:
+                    offspring = ops.create(ranked_population, n_offspring)
+                    kwargs = {}
+                    if prune_evaluations and len(current_population) == max_pop_size:
+                        # A new individual which scores far worse than the entire
+                        # population is unlikely to survive, so stop it early.
+                        threshold = _prune_threshold(current_population, prune_margin)
+                        if threshold is not None:
+                            kwargs["prune_threshold"] = threshold
+                    for new_individual in offspring:
+                        ops.submit(async_, new_individual, **kwargs)
 
                 should_restart = restart_callback is not None and restart_callback()
-                n_evaluated_individuals += 1
+                n_evaluated_individuals += len(futures)
                 if should_restart:
                     log.info("Restart criterion met. Creating new random population.")
                     start_candidates = [ops.individual() for _ in range(max_pop_size)]
                     break
 
     return current_population
+
+
+def _prune_threshold(population: List[Individual], margin: float) -> Optional[float]:
+    """ The score below which a new individual is pruned, None if there is none.
+
+    Individuals without (finite) scores are ignored, a score of -inf would otherwise
+    prevent any pruning.
+    """
+    scores = [
+        i.fitness.values[0]
+        for i in population
+        if i.fitness is not None and math.isfinite(i.fitness.values[0])
+    ]
+    if not scores:
+        return None
+    worst = min(scores)
+    return worst - margin * abs(worst)
@@ -9,7 +9,6 @@ from gama.search_methods.base_search import (
     BaseSearch,
     _check_base_search_hyperparameters,
 )
-from gama.utilities.generic.async_evaluator import AsyncEvaluator
 
 log = logging.getLogger(__name__)
 
@@ -51,14 +50,15 @@ def random_search(
     """
     _check_base_search_hyperparameters(operations, output, start_candidates)
 
-    with AsyncEvaluator() as async_:
+    with operations.executor() as async_:
         for individual in start_candidates:
-            async_.submit(operations.evaluate, individual)
+            operations.submit(async_, individual)
 
         while (max_evaluations is None) or (len(output) < max_evaluations):
-            future = operations.wait_next(async_)
-            if future.result is not None:
-                output.append(future.result.individual)
-            async_.submit(operations.evaluate, operations.individual())
+            for future in operations.wait_completed(async_):
+                if future.result is not None:
+                    output.append(future.result.individual)
+            for _ in range(async_.queue_depth - async_.n_queued):
+                operations.submit(async_, operations.individual())
 
     return output
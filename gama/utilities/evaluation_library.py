@@ -10,6 +10,7 @@ import pandas as pd
 from sklearn.model_selection import StratifiedShuffleSplit
 
 from gama.genetic_programming.components import Individual
+from gama.utilities.generic.prediction_store import PredictionStore
 
 log = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class Evaluation:
         duration: float = -1,
         error: str = None,
         pid: Optional[int] = None,
+        pruned: bool = False,
     ):
         self.individual: Individual = individual
         self.score = score
@@ -35,39 +37,62 @@ class Evaluation:
         self.duration = duration
         self.error = error
         self.pid = pid
-        self._cache_file = None
+        # True if cross-validation was stopped early, see `evaluate_pipeline`.
+        self.pruned = pruned
+        # Where the estimators and predictions are kept, if moved to disk.
+        self._estimators_file: Optional[str] = None
+        self._prediction_store: Optional[PredictionStore] = None
+        self._prediction_key: Optional[int] = None
 
         if isinstance(predictions, (pd.Series, pd.DataFrame)):
             predictions = predictions.values
         self._predictions: Optional[np.ndarray] = predictions
 
-    def to_disk(self, directory):
-        self._cache_file = os.path.join(directory, str(self.individual._id) + ".pkl")
-        with open(self._cache_file, "wb") as fh:
-            pickle.dump((self._estimators, self._predictions), fh)
-        self._estimators, self._predictions = [], None
+    def to_disk(self, directory: str, prediction_store: PredictionStore):
+        """ Move the estimators to a file in `directory`, predictions to the store. """
+        if self._estimators_file is None:
+            self.estimators_to_disk(directory)
+        if self._predictions is not None:
+            self._prediction_key = prediction_store.add(self._predictions)
+            self._prediction_store = prediction_store
+        self._predictions = None
+
+    def estimators_to_disk(self, directory):
+        """ Move the estimators to a file in `directory`.
+
+        Called by the process which evaluated the individual, so that the estimators
+        do not need to be sent to the main process.
+        """
+        name = f"{self.individual._id}.estimators.pkl"
+        self._estimators_file = os.path.join(directory, name)
+        with open(self._estimators_file, "wb") as fh:
+            pickle.dump(self._estimators, fh)
+        self._estimators = []
 
     def remove_from_disk(self):
-        os.remove(os.path.join(self._cache_file))
-        self._cache_file = None
+        """ Remove the data stored by `to_disk`, if any. It is discarded. """
+        if self._estimators_file is not None and os.path.exists(self._estimators_file):
+            os.remove(self._estimators_file)
+        if self._prediction_key is not None:
+            self._prediction_store.remove(self._prediction_key)
+        self._estimators_file, self._prediction_key = None, None
+        self._prediction_store = None
 
     @property
     def estimators(self):
-        if self._estimators or not self._cache_file:
+        if self._estimators or not self._estimators_file:
             return self._estimators
         else:
-            with open(self._cache_file, "rb") as fh:
-                estimators, _ = pickle.load(fh)
-                return estimators
+            with open(self._estimators_file, "rb") as fh:
+                return pickle.load(fh)
 
     @property
     def predictions(self):
-        if self._predictions is not None or not self._cache_file:
+        if self._predictions is not None or self._prediction_key is None:
             return self._predictions
         else:
-            with open(self._cache_file, "rb") as fh:
-                _, predictions = pickle.load(fh)
-                return predictions
+            # A read-only view of the memory-mapped predictions, not a copy.
+            return self._prediction_store.get(self._prediction_key)
 
     # Is there a better way to do this?
     # Assignment in __init__ is not preferred even if it saves lines.
@@ -102,6 +127,8 @@ class EvaluationLibrary:
     As soon as an evaluation is no longer in the top `m`,
     its estimators and the sampled predictions are also discarded.
     Other evaluation meta-data (e.g. scores, evaluation time, errors) is not discarded.
+    Kept estimators are pickled to the cache directory, kept predictions are stored
+    as float32 in a single memory-mapped matrix there (see `PredictionStore`).
 
     This discarding is useful to reduce memory usage when you know which meta-data
     is used later. E.g.:
@@ -143,15 +170,20 @@ class EvaluationLibrary:
         self.other_evaluations: List[Evaluation] = []
         self._m = m
         self._sample_n = n
-        self.lookup: Dict[str, Evaluation] = {}
+        # Maps `Individual.key` to its evaluation.
+        self.lookup: Dict[Tuple, Evaluation] = {}
         self._cache = os.path.expandvars(cache)
         if not os.path.exists(self._cache):
             os.mkdir(self._cache)
+        # Predictions of the top `m` evaluations, the `m + 1`th is stored before
+        # the evaluation it replaces is removed.
+        capacity = 16 if m is None or m == 0 else m + 1
+        self._prediction_store = PredictionStore(self._cache, capacity=capacity)
 
-        def main_node_str(e: Evaluation):
-            return str(e.individual.main_node)
+        def individual_key(e: Evaluation):
+            return e.individual.key
 
-        self._lookup_key = main_node_str
+        self._lookup_key = individual_key
 
         if sample is not None:
             self._sample = sample
@@ -164,6 +196,11 @@ class EvaluationLibrary:
     def evaluations(self) -> List[Evaluation]:
         return self.top_evaluations + self.other_evaluations
 
+    @property
+    def keeps_fitted(self) -> bool:
+        """ bool: False if estimators and predictions of evaluations are discarded. """
+        return self._m is None or self._m > 0
+
     def determine_sample_indices(
         self,
         n: Optional[int] = None,
@@ -231,19 +268,23 @@ class EvaluationLibrary:
         self._process_predictions(evaluation)
 
         if evaluation.error is not None:
+            # Estimators may have been written to disk before the error was set,
+            # e.g. by ASHA for evaluations on a lower rung.
+            evaluation.remove_from_disk()
             evaluation._estimators, evaluation._predictions = None, None
             self.other_evaluations.append(evaluation)
         elif self._m is None or self._m > len(self.top_evaluations):
-            evaluation.to_disk(self._cache)
+            evaluation.to_disk(self._cache, self._prediction_store)
             heapq.heappush(self.top_evaluations, evaluation)
         else:
             removed = heapq.heappushpop(self.top_evaluations, evaluation)
-            if removed == evaluation:
+            if removed is evaluation:
                 # new evaluation is not in heap, big memory items may be discarded
+                removed.remove_from_disk()
                 removed._predictions, removed._estimators = None, None
             else:
                 # new evaluation is now on the heap, remove old from disk
-                evaluation.to_disk(self._cache)
+                evaluation.to_disk(self._cache, self._prediction_store)
                 removed.remove_from_disk()
 
             self.other_evaluations.append(removed)
@@ -251,6 +292,7 @@ class EvaluationLibrary:
         self.lookup[self._lookup_key(evaluation)] = evaluation
 
     def clear_cache(self):
+        self._prediction_store.close()
         for file in os.listdir(self._cache):
             os.remove(os.path.join(self._cache, file))
         os.rmdir(self._cache)
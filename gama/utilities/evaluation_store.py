@@ -0,0 +1,164 @@
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+from typing import Optional, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from gama.genetic_programming.components import Individual, Fitness
+from gama.utilities.evaluation_library import Evaluation
+
+log = logging.getLogger(__name__)
+
+
+def dataset_fingerprint(
+    x: pd.DataFrame, y: pd.Series, folds: np.ndarray, extra: Iterable[str] = ()
+) -> str:
+    """ str: A hash which identifies the data, CV folds and `extra` settings.
+
+    Evaluations of the same pipeline with the same fingerprint yield the same result.
+    """
+    fingerprint = hashlib.sha256()
+    fingerprint.update(pd.util.hash_pandas_object(x, index=False).values.tobytes())
+    fingerprint.update(",".join(map(str, x.columns)).encode())
+    fingerprint.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+    fingerprint.update(np.ascontiguousarray(folds).tobytes())
+    for value in extra:
+        fingerprint.update(value.encode())
+    return fingerprint.hexdigest()
+
+
+class EvaluationStore:
+    """ Persists evaluations to a SQLite database, so they can be reused across runs.
+
+    Evaluations are keyed by the dataset fingerprint (see `dataset_fingerprint`)
+    and the pipeline string of the individual.
+    By default only the score, error and timing are stored. If `store_models` is
+    set, the fold estimators and predictions are stored too, so evaluations loaded
+    from the store can be used in post-processing. This is slow and the database
+    grows quickly, as the estimators are pickled by the main process.
+    If `requires_fitted` is set, successful evaluations which were stored without
+    estimators and predictions are ignored.
+    The store should only be accessed from the main process.
+    The connection is opened when needed, and closed by `close` or on exit.
+    """
+
+    def __init__(self, path: str, store_models: bool = False):
+        """
+        Parameters
+        ----------
+        path: str
+            Path to the SQLite database file, it is created if it does not exist.
+        store_models: bool (default=False)
+            If True, also store the estimators and predictions of evaluations.
+        """
+        self._path = os.path.expandvars(os.path.expanduser(path))
+        self._store_models = store_models
+        self._connection: Optional[sqlite3.Connection] = None
+        # Must be set (per dataset) before the store can be used.
+        self.fingerprint: Optional[str] = None
+        # If True, only evaluations with estimators and predictions are loaded.
+        self.requires_fitted = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def _connect(self) -> sqlite3.Connection:
+        """ Return the connection to the database, it is opened on first use. """
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._path)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS evaluations ("
+                " fingerprint TEXT, pipeline TEXT, score TEXT, error TEXT,"
+                " wallclock_time REAL, process_time REAL, fitted INTEGER,"
+                " models BLOB, PRIMARY KEY (fingerprint, pipeline))"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def _select(self, columns: str, individual: Individual) -> Optional[Tuple]:
+        """ Select `columns` of the stored evaluation of `individual`, if usable. """
+        cursor = self._connect().execute(
+            f"SELECT {columns} FROM evaluations"
+            " WHERE fingerprint = ? AND pipeline = ?"
+            " AND (fitted OR error IS NOT NULL OR NOT ?)",
+            (self.fingerprint, individual.pipeline_str(), self.requires_fitted),
+        )
+        return cursor.fetchone()
+
+    def __contains__(self, individual: Individual) -> bool:
+        return self._select("1", individual) is not None
+
+    def load(self, individual: Individual) -> Optional[Evaluation]:
+        """ Return the stored evaluation of `individual`'s pipeline, or None.
+
+        The fitness of `individual` is set to the stored fitness.
+        """
+        columns = "score, error, wallclock_time, process_time, models"
+        row = self._select(columns, individual)
+        if row is None:
+            return None
+
+        score, error, wallclock_time, process_time, models = row
+        estimators, predictions = None, None
+        if models is not None:
+            estimators, predictions = pickle.loads(models)
+        start_time = datetime.now()
+        evaluation = Evaluation(
+            individual,
+            predictions=predictions,
+            score=tuple(json.loads(score)),
+            estimators=estimators,
+            start_time=start_time,
+            duration=wallclock_time,
+            error=error,
+            pid=os.getpid(),
+        )
+        individual.fitness = Fitness(
+            evaluation.score, start_time, wallclock_time, process_time
+        )
+        return evaluation
+
+    def save(self, evaluation: Evaluation) -> None:
+        """ Store `evaluation`, unless its result depends on the circumstances.
+
+        Pruned evaluations, and those which failed due to time or memory constraints
+        are not stored.
+        """
+        error = evaluation.error or ""
+        if evaluation.pruned or "TimeoutException" in error or "MemoryError" in error:
+            return
+
+        fitness = evaluation.individual.fitness
+        models = None
+        if self._store_models and evaluation.predictions is not None:
+            models = pickle.dumps((evaluation.estimators, evaluation.predictions))
+        self._connect().execute(
+            "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.fingerprint,
+                evaluation.individual.pipeline_str(),
+                json.dumps(list(evaluation.score)),
+                evaluation.error,
+                fitness.wallclock_time if fitness else evaluation.duration,
+                fitness.process_time if fitness else evaluation.duration,
+                models is not None,
+                models,
+            ),
+        )
+        self._connect().commit()
+
+    def close(self):
+        """ Close the connection, it is reopened if the store is used again. """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -14,21 +14,30 @@ but it has issues:
       Though that does not hinder the execution of the program,
       I don't want errors for expected behavior.
 """
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import CancelledError
 import datetime
 import gc
 import logging
 import multiprocessing
+from multiprocessing.connection import wait
 import os
 import psutil
 import queue
+import shutil
 import struct
+import tempfile
+import threading
 import time
 import traceback
-from typing import Optional, Callable, Dict, List
+from typing import Optional, Callable, Deque, Dict, List, Set, Tuple
 import uuid
 
 from psutil import NoSuchProcess
 
+from gama.utilities.generic.shared_data import share_if_large, load_shared, SharedData
+
 try:
     import resource
 except ModuleNotFoundError:
@@ -61,34 +70,119 @@ class AsyncFuture:
             self.traceback = traceback.format_exc()
 
 
-class AsyncEvaluator:
-    """ Manages subprocesses on which arbitrary functions can be evaluated.
+class BaseEvaluator(ABC):
+    """ Executes function calls asynchronously, used by search methods.
 
-    The function and all its arguments must be picklable.
-    Using the same AsyncEvaluator in two different contexts raises a `RuntimeError`.
+    Futures are created with `submit`, and returned when completed by `wait_next`
+    or `completed_futures`. The evaluator must be used as a context manager,
+    using the same evaluator in two different contexts raises a `RuntimeError`.
 
     defaults: Dict, optional (default=None)
         Default parameter values shared between all submit calls.
-        This allows these defaults to be transferred only once per process,
-        instead of twice per call (to and from the subprocess).
         Only supports keyword arguments.
+        If not passed to `__init__`, the class attribute `defaults` is used.
     """
 
     defaults: Dict = {}
 
+    def __init__(self, defaults: Optional[Dict] = None):
+        self._has_entered = False
+        self.futures: Dict[uuid.UUID, AsyncFuture] = {}
+        self._given_defaults = defaults
+
+    def _enter(self):
+        """ Guard against entering the evaluator twice. """
+        if self._has_entered:
+            raise RuntimeError(
+                f"You can not use the same {self.__class__.__name__} "
+                "in two different contexts."
+            )
+        self._has_entered = True
+
+    def _get_defaults(self) -> Dict:
+        """ The defaults passed on construction, or the class attribute otherwise. """
+        if self._given_defaults is not None:
+            return self._given_defaults
+        return type(self).defaults
+
+    @abstractmethod
+    def __enter__(self):
+        raise NotImplementedError("Must be implemented by child class.")
+
+    @abstractmethod
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        raise NotImplementedError("Must be implemented by child class.")
+
+    @property
+    @abstractmethod
+    def queue_depth(self) -> int:
+        """ int: Number of futures which should be queued or running at any time.
+
+        Search methods should submit `queue_depth - n_queued` new futures
+        after processing completed ones, so no worker is idle while waiting
+        for the main process.
+        """
+        raise NotImplementedError("Must be implemented by child class.")
+
+    @property
+    def n_queued(self) -> int:
+        """ int: Number of submitted futures which have not been returned yet. """
+        return len(self.futures)
+
+    @abstractmethod
+    def submit(self, fn: Callable, *args, **kwargs) -> AsyncFuture:
+        """ Submit fn(*args, **kwargs) to be evaluated, returns its AsyncFuture. """
+        raise NotImplementedError("Must be implemented by child class.")
+
+    @abstractmethod
+    def cancel(self, future: AsyncFuture) -> bool:
+        """ Cancel `future`, False if it was already returned. """
+        raise NotImplementedError("Must be implemented by child class.")
+
+    @abstractmethod
+    def wait_next(self) -> AsyncFuture:
+        """ Wait until an AsyncFuture has been completed and return it. """
+        raise NotImplementedError("Must be implemented by child class.")
+
+    @abstractmethod
+    def completed_futures(self) -> List[AsyncFuture]:
+        """ Return all AsyncFutures which have completed, without blocking. """
+        raise NotImplementedError("Must be implemented by child class.")
+
+
+class AsyncEvaluator(BaseEvaluator):
+    """ Manages subprocesses on which arbitrary functions can be evaluated.
+
+    The function and all its arguments must be picklable.
+    Using the same AsyncEvaluator in two different contexts raises a `RuntimeError`.
+
+    Defaults are transferred only once per process,
+    instead of twice per call (to and from the subprocess).
+    Large pandas and numpy values are shared through memory-mapped files instead,
+    see `shared_data_threshold_mb`.
+    """
+
     def __init__(
         self,
         n_workers: Optional[int] = None,
         memory_limit_mb: Optional[int] = None,
         logfile: Optional[str] = None,
         wait_time_before_forced_shutdown: int = 10,
+        shared_data_threshold_mb: Optional[float] = 64,
+        monitor_interval: float = 1.0,
+        prefetch: int = 2,
+        hard_timeout: Optional[float] = None,
+        worker_memory_limit_mb: Optional[float] = None,
+        max_tasks_per_worker: Optional[int] = None,
+        adaptive_workers: bool = False,
+        defaults: Optional[Dict] = None,
     ):
         """
         Parameters
         ----------
         n_workers : int, optional (default=None)
             Maximum number of subprocesses to run for parallel evaluations.
-            Defaults to `AsyncEvaluator.n_jobs`, using all cores unless overwritten.
+            If None, one subprocess per core is used.
         memory_limit_mb : int, optional (default=None)
             The maximum number of megabytes that this process and its subprocesses
             may use in total. If None, no limit is enforced.
@@ -98,32 +192,107 @@ class AsyncEvaluator:
         wait_time_before_forced_shutdown : int (default=10)
             Number of seconds to wait between asking the worker processes to shut down
             and terminating them forcefully if they failed to do so.
+        shared_data_threshold_mb : float, optional (default=64)
+            Values in `defaults` which are pandas or numpy data larger than this many
+            megabytes are written once to memory-mapped files, instead of pickled to
+            each subprocess. Subprocesses then share the same read-only memory.
+            If None, all defaults are pickled to each subprocess.
+        monitor_interval : float (default=1.0)
+            Number of seconds between checks of the memory usage of all processes.
+            Memory usage is checked, enforced and logged on a separate thread,
+            so it does not delay the collection of results. Workers which replace
+            killed workers are started by the main thread, the next time it submits
+            or waits for futures.
+        prefetch : int (default=2)
+            Number of futures to keep queued in addition to one per worker,
+            so that workers do not wait for new jobs, see `queue_depth`.
+        hard_timeout : float, optional (default=None)
+            If set, the worker running a future for more than this many seconds
+            is killed and replaced, and the future fails with a `TimeoutError`.
+            This also stops evaluations which do not respond to soft timeouts,
+            e.g. because they are stuck in C code. Checked by the monitor thread.
+        worker_memory_limit_mb : float, optional (default=None)
+            If set, each worker limits its address space (RLIMIT_AS) at startup to
+            this many megabytes more than it uses after loading the `defaults`.
+            An evaluation which exceeds it raises a `MemoryError` in the worker,
+            instead of the worker being terminated by the main process.
+            The address space also counts memory which is only reserved, e.g. by
+            malloc arenas or the stacks of BLAS/OpenMP threads, so set a generous
+            limit to avoid spurious errors. Not supported on Windows.
+        max_tasks_per_worker : int, optional (default=None)
+            If set, workers exit after completing this many futures, and are replaced
+            by new workers. This frees memory lost to heap fragmentation.
+            Large `defaults` are shared through memory-mapped files,
+            so new workers load them cheaply.
+        adaptive_workers : bool (default=False)
+            If True, the number of workers is adjusted between 1 and `n_workers`,
+            based on the peak memory and CPU utilization observed per evaluation.
+            Workers are added while they fit in `memory_limit_mb` and the CPU is
+            not oversubscribed (e.g. by estimators which use multiple threads),
+            and removed otherwise. Decisions are written to `logfile`.
+        defaults : Dict, optional (default=None)
+            Default keyword arguments of all submitted functions.
+            If None, the class attribute `defaults` is used.
         """
-        self._has_entered = False
-        self.futures: Dict[uuid.UUID, AsyncFuture] = {}
+        super().__init__(defaults)
         self._processes: List[psutil.Process] = []
-        self._n_jobs = n_workers
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        self._n_jobs: int = n_workers
         self._memory_limit_mb = memory_limit_mb
         self._mem_violations = 0
         self._mem_behaved = 0
         self._logfile = logfile
         self._wait_time_before_forced_shutdown = wait_time_before_forced_shutdown
+        self._shared_data_threshold_mb = shared_data_threshold_mb
+        self._shared_data_directory: Optional[str] = None
+        self._defaults: Dict = {}
+        self._monitor_interval = monitor_interval
+        self._prefetch = prefetch
+        self._hard_timeout = hard_timeout
+        self._worker_memory_limit_mb = worker_memory_limit_mb
+        self._max_tasks_per_worker = max_tasks_per_worker
+        self._adaptive_workers = adaptive_workers
+        # Resource usage of running evaluations by worker pid, see `_adapt_workers`.
+        self._usage: Dict[int, _EvaluationUsage] = {}
+        self._observed_usage: Deque[Tuple[float, float]] = deque(maxlen=50)
+        self._n_retiring = 0
+        self._last_adapted = time.time()
+        # Workers to start on the main thread, see `_start_requested_workers`.
+        self._n_requested_workers = 0
+        # Maps the pid of each busy worker to the id and start time of its future.
+        self._running: Dict[int, Tuple[uuid.UUID, float]] = {}
+        self._cancelled: Set[uuid.UUID] = set()
+        # The lock guards `_processes` and the memory counters against concurrent
+        # modification by the monitor thread and the main thread.
+        self._process_lock = threading.RLock()
+        self._stop_monitor = threading.Event()
+        self._monitor_thread: Optional[threading.Thread] = None
 
         self._input: multiprocessing.Queue = multiprocessing.Queue()
         self._output: multiprocessing.Queue = multiprocessing.Queue()
         self._command: multiprocessing.Queue = multiprocessing.Queue()
+        self._worker_events: multiprocessing.Queue = multiprocessing.Queue()
         pid = os.getpid()
         self._main_process = psutil.Process(pid)
 
     def __enter__(self):
-        if self._has_entered:
-            raise RuntimeError(
-                "You can not use the same AsyncEvaluator in two different contexts."
-            )
-        self._has_entered = True
+        self._enter()
 
         self._input = multiprocessing.Queue()
         self._output = multiprocessing.Queue()
+        self._worker_events = multiprocessing.Queue()
+
+        self._shared_data_directory = tempfile.mkdtemp(prefix="gama_shared_")
+        self._defaults = {
+            name: share_if_large(
+                value, self._shared_data_directory, self._shared_data_threshold_mb
+            )
+            for name, value in self._get_defaults().items()
+        }
+        for name, value in self._defaults.items():
+            if isinstance(value, SharedData):
+                log.debug(f"Sharing '{name}' ({value.nbytes} bytes) through memmap.")
 
         log.debug(
             f"Process {self._main_process.pid} starting {self._n_jobs} subprocesses."
@@ -131,12 +300,22 @@ class AsyncEvaluator:
         for _ in range(self._n_jobs):
             self._start_worker_process()
         self._log_memory_usage()
+
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_memory_usage, name="gama-memory-monitor", daemon=True
+        )
+        self._monitor_thread.start()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop_monitor.set()
+        if self._monitor_thread is not None:
+            self._monitor_thread.join()
+
         log.debug(f"Signaling {len(self._processes)} subprocesses to stop.")
 
-        for _ in self._processes:
+        # Workers which are retiring already received their command.
+        for _ in range(len(self._processes) - self._n_retiring):
             self._command.put("stop")
 
         for i in range(self._wait_time_before_forced_shutdown + 1):
@@ -151,8 +330,26 @@ class AsyncEvaluator:
                     process.terminate()
                 except psutil.NoSuchProcess:
                     pass
+
+        # Processes which are still shutting down may still hold the files open,
+        # on some platforms this prevents their removal. This is not a concern,
+        # as they are created in the temporary directory of the operating system.
+        if self._shared_data_directory is not None:
+            shutil.rmtree(self._shared_data_directory, ignore_errors=True)
         return False
 
+    @property
+    def queue_depth(self) -> int:
+        """ int: Number of futures which should be queued or running at any time.
+
+        Search methods should submit `queue_depth - n_queued` new futures
+        after processing completed ones, so no worker is idle while waiting
+        for the main process.
+        """
+        with self._process_lock:
+            n_workers = len(self._processes) + self._n_requested_workers
+            return n_workers + self._prefetch
+
     def submit(self, fn: Callable, *args, **kwargs) -> AsyncFuture:
         """ Submit fn(*args, **kwargs) to be evaluated on a subprocess.
 
@@ -171,19 +368,41 @@ class AsyncEvaluator:
             A Future of which the `result` or `exception` field will be populated
             once evaluation is finished.
         """
+        self._start_requested_workers()
         future = AsyncFuture(fn, *args, **kwargs)
         self.futures[future.id] = future
         self._input.put(future)
         return future
 
-    def wait_next(self, poll_time: float = 0.05) -> AsyncFuture:
+    def cancel(self, future: AsyncFuture) -> bool:
+        """ Cancel `future`, killing its worker if it is already running.
+
+        The future is returned by `wait_next` with a `CancelledError` as exception.
+        A worker which starts a cancelled future is killed and replaced as well.
+
+        Returns
+        -------
+        bool
+            False if the future was already returned, True otherwise.
+        """
+        with self._process_lock:
+            if future.id not in self.futures or future.id in self._cancelled:
+                return False
+            self._cancelled.add(future.id)
+        self._output.put(_failed_copy(future, CancelledError("Future was cancelled.")))
+        return True
+
+    def wait_next(self, poll_time: float = 0.5) -> AsyncFuture:
         """ Wait until an AsyncFuture has been completed and return it.
 
+        Blocks on the output queue, so a completed future is returned immediately.
 
         Parameters
         ----------
-        poll_time: float (default=0.05)
-            Time to sleep between checking if a future has been completed.
+        poll_time: float (default=0.5)
+            Maximum time to block at once while waiting for a future to complete.
+            In between, exceptions raised asynchronously in this thread
+            (e.g. by `stopit.ThreadingTimeout`) are processed.
 
         Returns
         -------
@@ -199,40 +418,189 @@ class AsyncEvaluator:
             raise RuntimeError("No Futures queued, must call `submit` first.")
 
         while True:
-            self._control_memory_usage()
-            self._log_memory_usage()
-
             try:
-                completed_future = self._output.get(block=False)
+                completed_future = self._get_completed(block=True, timeout=poll_time)
             except queue.Empty:
-                time.sleep(poll_time)
                 continue
+            return self._match_completed(completed_future)
+
+    def completed_futures(self) -> List[AsyncFuture]:
+        """ Return all AsyncFutures which have completed, without blocking.
 
+        Returns
+        -------
+        List[AsyncFuture]
+            The completed futures that were not yet returned, may be empty.
+        """
+        completed: List[AsyncFuture] = []
+        while True:
+            try:
+                completed_future = self._get_completed(block=False)
+            except queue.Empty:
+                return completed
+            completed.append(self._match_completed(completed_future))
+
+    def _match_completed(self, completed_future: AsyncFuture) -> AsyncFuture:
+        """ Record the results of a future returned by a subprocess on its original. """
+        with self._process_lock:
             match = self.futures.pop(completed_future.id)
-            match.result, match.exception, match.traceback = (
-                completed_future.result,
-                completed_future.exception,
-                completed_future.traceback,
-            )
             self._mem_behaved += 1
-            return match
+        match.result, match.exception, match.traceback = (
+            completed_future.result,
+            completed_future.exception,
+            completed_future.traceback,
+        )
+        return match
+
+    def _get_completed(self, block: bool, timeout: Optional[float] = None):
+        """ Get the next completed future which was not returned yet.
+
+        A future which is cancelled, or whose worker is killed, is returned as failed.
+        The result of its worker may still arrive afterwards, and is then skipped.
+        """
+        while True:
+            self._start_requested_workers()
+            completed_future = self._output.get(block=block, timeout=timeout)
+            with self._process_lock:
+                if not isinstance(completed_future, _FailedFuture):
+                    # Failed futures are put by this process, the worker may still
+                    # be running and must be killed.
+                    self._remove_running(completed_future.id)
+                if completed_future.id in self.futures:
+                    return completed_future
+                self._cancelled.discard(completed_future.id)
+
+    def _remove_running(self, future_id: uuid.UUID):
+        for pid, (running_id, _) in list(self._running.items()):
+            if running_id == future_id:
+                del self._running[pid]
+
+    def _monitor_memory_usage(self):
+        """ Periodically enforce and log memory usage until `_stop_monitor` is set. """
+        while not self._stop_monitor.wait(self._monitor_interval):
+            try:
+                with self._process_lock:
+                    self._control_running_time()
+                    self._control_memory_usage()
+                    if self._adaptive_workers:
+                        self._adapt_workers()
+                    self._log_memory_usage()
+            except Exception:
+                # The monitor must keep running, the evaluations are unaffected.
+                log.warning("Error while monitoring memory usage.", exc_info=True)
 
     def _start_worker_process(self) -> psutil.Process:
         """ Start a new worker node and add it to the process pool. """
         mp_process = multiprocessing.Process(
             target=evaluator_daemon,
-            args=(self._input, self._output, self._command, AsyncEvaluator.defaults),
+            args=(
+                self._input,
+                self._output,
+                self._command,
+                self._defaults,
+                self._worker_events,
+                self._worker_memory_limit_mb,
+                self._max_tasks_per_worker,
+            ),
             daemon=True,
         )
         mp_process.start()
         subprocess = psutil.Process(mp_process.pid)
-        self._processes.append(subprocess)
+        with self._process_lock:
+            self._processes.append(subprocess)
         return subprocess
 
+    def _request_worker_process(self):
+        """ Have the main thread start a new worker, see `_start_requested_workers`. """
+        with self._process_lock:
+            self._n_requested_workers += 1
+
+    def _start_requested_workers(self):
+        """ Start the workers requested by the monitor thread, on the main thread.
+
+        Forking a process while another thread holds a lock (e.g. of `logging`) can
+        deadlock the child, so the monitor thread only requests new workers.
+        While `_process_lock` is held, the monitor thread holds no other locks.
+        """
+        with self._process_lock:
+            while self._n_requested_workers > 0:
+                self._n_requested_workers -= 1
+                self._start_worker_process()
+
     def _stop_worker_process(self, process: psutil.Process):
         """ Terminate a new worker node and remove it from the process pool. """
         process.terminate()
-        self._processes.remove(process)
+        with self._process_lock:
+            self._processes.remove(process)
+
+    def _kill_worker_process(self, process: psutil.Process, error: Exception):
+        """ Kill and replace a worker, failing the future it runs with `error`. """
+        log.info(f"Killing {process.pid}: {error}")
+        try:
+            process.kill()
+        except psutil.NoSuchProcess:
+            pass
+        with self._process_lock:
+            if process in self._processes:
+                self._processes.remove(process)
+            self._fail_running_future(process.pid, error)
+        self._request_worker_process()
+
+    def _fail_running_future(self, pid: int, error: Exception):
+        """ Return the future running on process `pid` (if any) as failed. """
+        running = self._running.pop(pid, None)
+        if running is None:
+            return
+        future_id, _ = running
+        if future_id in self._cancelled:
+            # Already returned by `cancel`.
+            self._cancelled.discard(future_id)
+        elif future_id in self.futures:
+            self._output.put(_failed_copy(self.futures[future_id], error))
+
+    def _process_worker_events(self):
+        """ Record which futures workers started, and replace workers which exited. """
+        while True:
+            try:
+                pid, future_id, timestamp = self._worker_events.get(block=False)
+            except queue.Empty:
+                break
+            if future_id is None:
+                self._worker_exited(pid)
+            # A result may be returned before its start is processed.
+            elif future_id in self.futures or future_id in self._cancelled:
+                self._running[pid] = (future_id, timestamp)
+
+    def _worker_exited(self, pid: int):
+        """ Replace a worker which exited after `max_tasks_per_worker` futures.
+
+        Workers which exited because they were retired by `_adapt_workers`,
+        are not replaced.
+        """
+        with self._process_lock:
+            exited = [process for process in self._processes if process.pid == pid]
+            if not exited:
+                return
+            self._processes.remove(exited[0])
+            if self._n_retiring > 0:
+                self._n_retiring -= 1
+                return
+        log.debug(f"Replacing {pid}, which completed its maximum number of tasks.")
+        self._request_worker_process()
+
+    def _control_running_time(self):
+        """ Kill workers which run a cancelled future or exceed `hard_timeout`. """
+        self._process_worker_events()
+        now = time.time()
+        for process in list(self._processes):
+            if process.pid not in self._running:
+                continue
+            future_id, start = self._running[process.pid]
+            if future_id in self._cancelled:
+                self._kill_worker_process(process, CancelledError("Cancelled."))
+            elif self._hard_timeout is not None and now - start > self._hard_timeout:
+                error = TimeoutError(f"Exceeded hard timeout of {self._hard_timeout}s.")
+                self._kill_worker_process(process, error)
 
     def _control_memory_usage(self, threshold=0.05):
         """ Dynamically restarts or kills processes to adhere to memory constraints. """
@@ -272,8 +640,9 @@ class AsyncEvaluator:
                 # restart `pid`
                 log.info(f"Terminating {proc.pid} due to memory usage.")
                 self._stop_worker_process(proc)
+                self._fail_running_future(proc.pid, MemoryError("Worker was killed."))
                 log.info("Starting new evaluations process.")
-                self._start_worker_process()
+                self._request_worker_process()
             else:
                 # More than one process left alive and a violation of the threshold,
                 # requires killing a subprocess.
@@ -281,7 +650,85 @@ class AsyncEvaluator:
                 self._mem_violations = 0
                 log.info(f"Terminating {proc.pid} due to memory usage.")
                 self._stop_worker_process(proc)
-            # todo: update the Future of the evaluation that was terminated.
+                self._fail_running_future(proc.pid, MemoryError("Worker was killed."))
+
+    def _sample_evaluation_usage(self):
+        """ Update the peak memory and CPU time of evaluations running on workers. """
+        now = time.time()
+        for process in self._processes:
+            running = self._running.get(process.pid)
+            usage = self._usage.get(process.pid)
+            if usage is not None and (running is None or running[0] != usage.future_id):
+                self._record_usage(self._usage.pop(process.pid))
+                usage = None
+            if running is None:
+                continue
+            try:
+                memory_mb = process.memory_info()[0] / (2 ** 20)
+                cpu_times = process.cpu_times()
+            except NoSuchProcess:
+                continue
+            cpu_time = cpu_times.user + cpu_times.system
+            if usage is None:
+                usage = _EvaluationUsage(running[0], memory_mb, now, cpu_time)
+                self._usage[process.pid] = usage
+            usage.peak_mb = max(usage.peak_mb, memory_mb)
+            usage.last_time, usage.last_cpu_time = now, cpu_time
+
+        for pid in set(self._usage) - {process.pid for process in self._processes}:
+            self._record_usage(self._usage.pop(pid))
+
+    def _record_usage(self, usage: "_EvaluationUsage"):
+        duration = usage.last_time - usage.start_time
+        if duration > 0:
+            cpu_utilization = (usage.last_cpu_time - usage.start_cpu_time) / duration
+            self._observed_usage.append((usage.peak_mb, cpu_utilization))
+
+    def _adapt_workers(self, min_observations: int = 5, cooldown: float = 10):
+        """ Add or retire a worker, based on the resource usage of evaluations.
+
+        The number of workers which fit is determined by the 90th percentile of peak
+        memory of recent evaluations (if there is a `memory_limit_mb`), and their
+        mean CPU utilization (e.g. 2.0 for an estimator which uses two cores).
+        At most one worker is added or retired each `cooldown` monitor intervals.
+        """
+        self._sample_evaluation_usage()
+        if len(self._observed_usage) < min_observations:
+            return
+        if time.time() - self._last_adapted < cooldown * self._monitor_interval:
+            return
+
+        peaks = sorted(peak_mb for peak_mb, _ in self._observed_usage)
+        peak_mb = peaks[int(0.9 * (len(peaks) - 1))]
+        cpu = sum(cpu for _, cpu in self._observed_usage) / len(self._observed_usage)
+        n_target = int(multiprocessing.cpu_count() / max(cpu, 1.0))
+        if self._memory_limit_mb is not None:
+            main_mb = self._main_process.memory_info()[0] / (2 ** 20)
+            n_target = min(n_target, int((self._memory_limit_mb - main_mb) / peak_mb))
+        n_target = max(1, min(n_target, self._n_jobs))
+
+        n_workers = len(self._processes) + self._n_requested_workers
+        n_workers -= self._n_retiring
+        if n_target > n_workers:
+            self._request_worker_process()
+            n_new = n_workers + 1
+        elif n_target < n_workers:
+            # The first idle worker to receive the command exits.
+            self._command.put("stop")
+            self._n_retiring += 1
+            n_new = n_workers - 1
+        else:
+            return
+        self._last_adapted = time.time()
+        message = (
+            f"Scaling from {n_workers} to {n_new} workers (target {n_target}), "
+            f"evaluations use up to {peak_mb:.0f}MB and {cpu:.2f} CPU."
+        )
+        log.info(message)
+        if self._logfile:
+            timestamp = datetime.datetime.now().isoformat()
+            with open(self._logfile, "a") as memory_log:
+                memory_log.write(f"{timestamp},{message}\n")
 
     def _log_memory_usage(self):
         if not self._logfile:
@@ -300,8 +747,14 @@ class AsyncEvaluator:
                 yield process, process.memory_info()[0] / (2 ** 20)
             except NoSuchProcess:
                 # can never be the main process anyway
+                self._process_worker_events()
+                if process not in self._processes:
+                    continue  # It exited gracefully, see `_process_worker_events`.
                 self._processes = [p for p in self._processes if p.pid != process.pid]
-                self._start_worker_process()
+                self._fail_running_future(
+                    process.pid, RuntimeError("Worker stopped unexpectedly.")
+                )
+                self._request_worker_process()
 
 
 def evaluator_daemon(
@@ -309,53 +762,141 @@ def evaluator_daemon(
     output_queue: queue.Queue,
     command_queue: queue.Queue,
     default_parameters: Optional[Dict] = None,
+    started_queue: Optional[queue.Queue] = None,
+    memory_limit_mb: Optional[float] = None,
+    max_tasks: Optional[int] = None,
 ):
     """ Function for daemon subprocess that evaluates functions from AsyncFutures.
 
     Parameters
     ----------
-    input_queue: queue.Queue[AsyncFuture]
+    input_queue: multiprocessing.Queue[AsyncFuture]
         Queue to get AsyncFuture from.
-        Queue should be managed by multiprocessing.manager.
-    output_queue: queue.Queue[AsyncFuture]
+    output_queue: multiprocessing.Queue[AsyncFuture]
         Queue to put AsyncFuture to.
-        Queue should be managed by multiprocessing.manager.
-    command_queue: queue.Queue[Str]
+    command_queue: multiprocessing.Queue[Str]
         Queue to put commands for the subprocess.
-        Queue should be managed by multiprocessing.manager.
     default_parameters: Dict, optional (default=None)
         Additional parameters to pass to AsyncFuture.Execute.
         This is useful to avoid passing lots of repetitive data through AsyncFuture.
+        Values which are `SharedData` handles are loaded before the first evaluation.
+    started_queue: multiprocessing.Queue[Tuple[int, uuid.UUID, float]], optional
+        If set, the pid, future id and start time are put to it before each future
+        is executed, so the main process knows which future runs on which process.
+        Before exiting (after `max_tasks` futures or a command), the future id put
+        is None.
+    memory_limit_mb: float, optional (default=None)
+        If set, limit the address space of this process to this many megabytes
+        more than it uses after loading `default_parameters`.
+    max_tasks: int, optional (default=None)
+        If set, exit after executing this many futures.
     """
+    # Wait on the pipes underlying the queues, so an idle worker blocks (without
+    # using CPU) until either a command or a new future is available.
+    readers = [command_queue._reader, input_queue._reader]  # type: ignore
     try:
+        default_parameters = load_shared(default_parameters or {})
+        if memory_limit_mb is not None:
+            _limit_address_space(memory_limit_mb)
+        n_tasks = 0
         while True:
+            wait(readers)
             try:
                 command_queue.get(block=False)
+                if started_queue is not None:
+                    started_queue.put((os.getpid(), None, time.time()))
                 break
             except queue.Empty:
                 pass
 
             try:
                 future = input_queue.get(block=False)
+                if started_queue is not None:
+                    started_queue.put((os.getpid(), future.id, time.time()))
                 future.execute(default_parameters)
                 if future.result:
                     if isinstance(future.result, tuple):
                         result = future.result[0]
                     else:
                         result = future.result
-                    if isinstance(result.error, MemoryError):
+                    error = getattr(result, "error", None)
+                    if isinstance(error, MemoryError):
                         # Can't pickle MemoryErrors. Should work around this later.
                         result.error = "MemoryError"
                         gc.collect()
+                    elif isinstance(error, str) and "MemoryError" in error:
+                        # Recorded by e.g. `evaluate_individual`, free what remains.
+                        gc.collect()
                 output_queue.put(future)
+                n_tasks += 1
             except (MemoryError, struct.error) as e:
                 future.result = None
                 future.exception = str(type(e))
                 gc.collect()
                 output_queue.put(future)
+                n_tasks += 1
             except queue.Empty:
+                # Another worker was first to retrieve the future.
                 pass
+
+            if max_tasks is not None and n_tasks >= max_tasks:
+                if started_queue is not None:
+                    started_queue.put((os.getpid(), None, time.time()))
+                break
     except Exception as e:
         # There are no plans currently for recovering from any exception:
         print(f"Stopping daemon:{type(e)}:{str(e)}")
         traceback.print_exc()
+
+
+def _limit_address_space(memory_limit_mb: float):
+    """ Limit the address space of this process to `memory_limit_mb` more than now.
+
+    Memory-mapped shared data and loaded libraries already count towards the
+    current address space, so the limit only constrains new allocations.
+    """
+    if resource is None:
+        return
+    current = psutil.Process().memory_info().vms
+    soft_limit = current + int(memory_limit_mb * 2 ** 20)
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+    if hard_limit != resource.RLIM_INFINITY:
+        soft_limit = min(soft_limit, hard_limit)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (soft_limit, hard_limit))
+    except (ValueError, OSError):
+        # e.g. on macOS, where RLIMIT_AS can not be lowered.
+        pass
+
+
+class _EvaluationUsage:
+    """ Resource usage of a future running on a worker, see `_adapt_workers`. """
+
+    __slots__ = (
+        "future_id",
+        "peak_mb",
+        "start_time",
+        "start_cpu_time",
+        "last_time",
+        "last_cpu_time",
+    )
+
+    def __init__(
+        self, future_id: uuid.UUID, memory_mb: float, time_: float, cpu_time: float
+    ):
+        self.future_id = future_id
+        self.peak_mb = memory_mb
+        self.start_time = self.last_time = time_
+        self.start_cpu_time = self.last_cpu_time = cpu_time
+
+
+class _FailedFuture(AsyncFuture):
+    """ Put on the output queue by the main process for a future which failed. """
+
+
+def _failed_copy(future: AsyncFuture, exception: Exception) -> _FailedFuture:
+    """ A copy of `future` to put on the output queue, as if it raised `exception`. """
+    failed = _FailedFuture(None)
+    failed.id = future.id
+    failed.exception = exception
+    return failed
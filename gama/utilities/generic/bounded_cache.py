@@ -0,0 +1,118 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+
+def approximate_size(value: Any) -> int:
+    """ Approximate the number of bytes used by (a tuple or list of) data objects.
+
+    Only numpy arrays, scipy sparse matrices and pandas objects are counted,
+    any other object is assumed to be small and counted as zero bytes.
+    """
+    if isinstance(value, (tuple, list)):
+        return sum(approximate_size(v) for v in value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if scipy.sparse.issparse(value):
+        arrays = ["data", "indices", "indptr", "row", "col"]
+        return sum(getattr(value, a).nbytes for a in arrays if hasattr(value, a))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=False))
+    return 0
+
+
+class BoundedCache:
+    """ A least-recently-used cache which stays within a memory budget.
+
+    Parameters
+    ----------
+    max_memory_mb: float
+        The cache evicts the least recently used entries to keep the total
+        (approximate) size of its values under this many megabytes.
+        Values which exceed the budget by themselves are never stored.
+
+    The cache may be shared by threads. When pickled, e.g. to a subprocess,
+    the copy is independent of the original.
+    """
+
+    def __init__(self, max_memory_mb: float):
+        self._max_bytes = max_memory_mb * (2 ** 20)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: "OrderedDict[Hashable, int]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """ Return the value stored under `key`, or `default` if there is none. """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            self._sizes.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any, nbytes: Optional[int] = None) -> bool:
+        """ Store `value` under `key`, evicting old entries if needed.
+
+        Parameters
+        ----------
+        key: Hashable
+            Key to store the value under. Overwrites any value stored under `key`.
+        value: Any
+            The value to store.
+        nbytes: int, optional (default=None)
+            Size of value in bytes. If None, use `approximate_size(value)`.
+
+        Returns
+        -------
+        bool
+            True if the value was stored, False if it exceeds the memory budget.
+        """
+        nbytes = approximate_size(value) if nbytes is None else nbytes
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if nbytes > self._max_bytes:
+                return False
+
+            while self.nbytes + nbytes > self._max_bytes:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(evicted_key)
+
+            self._entries[key] = value
+            self._sizes[key] = nbytes
+            self.nbytes += nbytes
+            return True
+
+    def clear(self):
+        """ Remove all entries from the cache. """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
@@ -0,0 +1,262 @@
+"""
+Evaluators which execute futures on threads of the main process,
+instead of on subprocesses. They follow the same `submit`/`wait_next` contract
+as the AsyncEvaluator, but futures and their results are never pickled
+and the defaults are never copied, so there is no inter-process communication.
+
+Threads can not be killed. A thread which runs a cancelled future or exceeds the
+hard timeout is abandoned instead: the future is returned as failed, the thread
+exits once the function returns, and a new thread takes its place.
+Arguments are deep-copied before execution, as they would be pickled for a
+subprocess, so that an abandoned function can not modify them afterwards.
+Memory limits are not enforced, as they would also apply to the main process.
+"""
+from concurrent.futures import CancelledError
+import copy
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import uuid
+
+from gama.utilities.generic.async_evaluator import (
+    AsyncFuture,
+    BaseEvaluator,
+    _failed_copy,
+)
+
+log = logging.getLogger(__name__)
+
+
+class ThreadEvaluator(BaseEvaluator):
+    """ Evaluates functions on a pool of threads in the main process.
+
+    Evaluations only run in parallel if they release the GIL, which is the case for
+    many estimators implemented in C (e.g. those of scikit-learn which use OpenMP).
+    """
+
+    def __init__(
+        self,
+        n_workers: Optional[int] = None,
+        prefetch: int = 2,
+        hard_timeout: Optional[float] = None,
+        defaults: Optional[Dict] = None,
+    ):
+        """
+        Parameters
+        ----------
+        n_workers : int, optional (default=None)
+            Number of threads to run evaluations on.
+            If None, one thread per core is used.
+        prefetch : int (default=2)
+            Number of futures to keep queued in addition to one per thread.
+        hard_timeout : float, optional (default=None)
+            If set, a future which runs for more than this many seconds fails with a
+            `TimeoutError`, and its thread is replaced. Checked while waiting for
+            futures, see `wait_next` and `completed_futures`.
+        defaults : Dict, optional (default=None)
+            Default keyword arguments of all submitted functions.
+            If None, the class attribute `defaults` is used.
+        """
+        super().__init__(defaults)
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        self._n_workers = n_workers
+        self._prefetch = prefetch
+        self._hard_timeout = hard_timeout
+        self._defaults: Dict = {}
+        self._input: queue.Queue = queue.Queue()
+        self._output: queue.Queue = queue.Queue()
+        # The lock guards the bookkeeping below, which worker threads also modify.
+        self._lock = threading.Lock()
+        # Maps the ident of each busy thread to the id and start time of its future.
+        self._running: Dict[int, Tuple[uuid.UUID, float]] = {}
+        # Threads which exit once their function returns, see `_abandon_running`.
+        self._abandoned: Set[int] = set()
+        self._cancelled: Set[uuid.UUID] = set()
+
+    def __enter__(self):
+        self._enter()
+        self._defaults = self._get_defaults()
+        for _ in range(self._n_workers):
+            self._start_worker_thread()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self._lock:
+            # Queued futures are not started, running ones can not be interrupted
+            # and are abandoned instead. Their threads exit when they return.
+            while True:
+                try:
+                    self._input.get(block=False)
+                except queue.Empty:
+                    break
+            self._abandoned.update(self._running)
+            self._running.clear()
+            self._cancelled.update(self.futures)
+            self.futures.clear()
+        for _ in range(self._n_workers):
+            self._input.put(None)
+        return False
+
+    @property
+    def queue_depth(self) -> int:
+        """ int: Number of futures which should be queued or running at any time. """
+        return self._n_workers + self._prefetch
+
+    def submit(self, fn: Callable, *args, **kwargs) -> AsyncFuture:
+        """ Submit fn(*args, **kwargs) to be evaluated on a thread. """
+        future = AsyncFuture(fn, *args, **kwargs)
+        self.futures[future.id] = future
+        self._input.put(future)
+        return future
+
+    def cancel(self, future: AsyncFuture) -> bool:
+        """ Cancel `future`, which is returned with a `CancelledError` as exception.
+
+        A thread which is running the future is abandoned.
+
+        Returns
+        -------
+        bool
+            False if the future was already returned or cancelled, True otherwise.
+        """
+        with self._lock:
+            if future.id not in self.futures or future.id in self._cancelled:
+                return False
+            self._cancelled.add(future.id)
+            self._abandon_running(future.id)
+        self._output.put(_failed_copy(future, CancelledError("Future was cancelled.")))
+        return True
+
+    def wait_next(self, poll_time: float = 0.5) -> AsyncFuture:
+        """ Wait until an AsyncFuture has been completed and return it.
+
+        Parameters
+        ----------
+        poll_time: float (default=0.5)
+            Maximum time to block at once while waiting for a future to complete.
+            In between, the hard timeout is enforced and exceptions raised
+            asynchronously in this thread (e.g. by `stopit.ThreadingTimeout`)
+            are processed.
+
+        Raises
+        ------
+        RuntimeError
+            If all futures have already been completed and returned.
+        """
+        if len(self.futures) == 0:
+            raise RuntimeError("No Futures queued, must call `submit` first.")
+
+        while True:
+            self._control_running_time()
+            try:
+                return self._get_completed(block=True, timeout=poll_time)
+            except queue.Empty:
+                continue
+
+    def completed_futures(self) -> List[AsyncFuture]:
+        """ Return all AsyncFutures which have completed, without blocking. """
+        self._control_running_time()
+        completed = []
+        while True:
+            try:
+                completed.append(self._get_completed(block=False))
+            except queue.Empty:
+                return completed
+
+    def _get_completed(self, block: bool, timeout: Optional[float] = None):
+        """ Get the next completed future which was not returned yet, see `cancel`. """
+        while True:
+            completed_future = self._output.get(block=block, timeout=timeout)
+            with self._lock:
+                if completed_future.id not in self.futures:
+                    continue
+                self._cancelled.discard(completed_future.id)
+                match = self.futures.pop(completed_future.id)
+            match.result, match.exception, match.traceback = (
+                completed_future.result,
+                completed_future.exception,
+                completed_future.traceback,
+            )
+            return match
+
+    def _start_worker_thread(self):
+        threading.Thread(target=self._work, name="gama-evaluator", daemon=True).start()
+
+    def _work(self):
+        """ Execute futures from the input queue until stopped or abandoned. """
+        ident = threading.get_ident()
+        while True:
+            future = self._input.get()
+            if future is None:
+                return
+            with self._lock:
+                if future.id not in self.futures or future.id in self._cancelled:
+                    continue
+                self._running[ident] = (future.id, time.time())
+
+            # Executed on a copy, so an abandoned future is not modified afterwards.
+            running_future = copy.copy(future)
+            running_future.args, running_future.kwargs = copy.deepcopy(
+                (future.args, future.kwargs)
+            )
+            running_future.execute(self._defaults)
+            with self._lock:
+                if ident in self._abandoned:
+                    self._abandoned.remove(ident)
+                    return
+                del self._running[ident]
+            self._output.put(running_future)
+
+    def _abandon_running(self, future_id: uuid.UUID):
+        """ Replace the thread running `future_id`, if any. Requires `_lock`. """
+        for ident, (running_id, _) in list(self._running.items()):
+            if running_id == future_id:
+                del self._running[ident]
+                self._abandoned.add(ident)
+                self._start_worker_thread()
+
+    def _control_running_time(self):
+        """ Fail futures which exceed `hard_timeout`, and replace their threads. """
+        if self._hard_timeout is None:
+            return
+        now = time.time()
+        error = TimeoutError(f"Exceeded hard timeout of {self._hard_timeout}s.")
+        with self._lock:
+            for future_id, start in list(self._running.values()):
+                if now - start > self._hard_timeout:
+                    log.info(f"Abandoning thread which runs {future_id}: {error}")
+                    self._cancelled.add(future_id)
+                    self._abandon_running(future_id)
+                    failed = _failed_copy(self.futures[future_id], error)
+                    self._output.put(failed)
+
+
+class SerialEvaluator(ThreadEvaluator):
+    """ Evaluates functions one at a time, in order of submission.
+
+    Functions are executed on a single thread, so that the main thread waits in
+    `wait_next` like it does for subprocesses. An exception raised asynchronously
+    in the main thread (e.g. by `stopit.ThreadingTimeout`) then interrupts the wait,
+    instead of possibly being caught by the evaluated function.
+    """
+
+    def __init__(
+        self, hard_timeout: Optional[float] = None, defaults: Optional[Dict] = None
+    ):
+        """
+        Parameters
+        ----------
+        hard_timeout : float, optional (default=None)
+            If set, a future which runs for more than this many seconds fails with a
+            `TimeoutError`, and the next future starts on a new thread.
+        defaults : Dict, optional (default=None)
+            Default keyword arguments of all submitted functions.
+            If None, the class attribute `defaults` is used.
+        """
+        super().__init__(
+            n_workers=1, prefetch=0, hard_timeout=hard_timeout, defaults=defaults
+        )
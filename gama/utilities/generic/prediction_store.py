@@ -0,0 +1,156 @@
+""" Store out-of-fold predictions of many models in a single memory-mapped matrix.
+
+Predictions are stored as float32 in a matrix of shape (capacity, samples, classes),
+with one row per model. Reading the predictions of a model returns a view of its row,
+so no file has to be unpickled and no copy is made, which makes repeated access
+(e.g. during ensemble hill-climbing) cheap. Predictions of shape (samples,) are
+stored with classes=1 and returned with their original shape.
+
+Storing float32 halves memory and disk usage compared to float64. This loses
+precision beyond about 7 significant digits, which is negligible for class
+probabilities but may matter for regression targets of large magnitude.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class PredictionStore:
+    """ Stores predictions of equal shape in rows of one memory-mapped float32 matrix.
+
+    The file is created when the first predictions are added, and its shape is
+    determined by those predictions. Rows of removed predictions are reused.
+    When all rows are in use, the capacity of the matrix doubles.
+    Pickling the store does not copy its matrix, an unpickled store reads from the
+    same file.
+    """
+
+    def __init__(self, directory: str, capacity: int = 16):
+        """
+        Parameters
+        ----------
+        directory: str
+            Directory in which to create the memory-mapped file.
+        capacity: int (default=16)
+            Number of rows to allocate initially.
+        """
+        if capacity < 1:
+            raise ValueError(f"`capacity` must be at least 1, is {capacity}.")
+        self._file = os.path.join(directory, "predictions.dat")
+        self._capacity = capacity
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._matrix: Optional[np.memmap] = None
+        # Maps the key returned by `add` to the row which holds its predictions.
+        self._index: Dict[int, int] = {}
+        self._free_rows: List[int] = []
+        self._next_key = 0
+        self._read_only = False
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._index
+
+    @property
+    def capacity(self) -> int:
+        """ int: Number of rows which can be used before the matrix grows. """
+        return self._capacity
+
+    def add(self, predictions: np.ndarray) -> int:
+        """ Store `predictions` and return the key with which to retrieve them.
+
+        Raises
+        ------
+        ValueError
+            If the shape of `predictions` differs from that of the first predictions.
+        """
+        if self._read_only:
+            raise RuntimeError("Can not add predictions to a closed store.")
+        predictions = np.asarray(predictions)
+        if self._shape is None:
+            if predictions.ndim not in (1, 2):
+                raise ValueError("Predictions must be one or two dimensional.")
+            self._shape = predictions.shape
+            self._map(mode="w+")
+            self._free_rows = list(reversed(range(self._capacity)))
+        elif predictions.shape != self._shape:
+            raise ValueError(
+                f"Predictions must have shape {self._shape}, not {predictions.shape}."
+            )
+
+        if not self._free_rows:
+            self._grow()
+        row = self._free_rows.pop()
+        matrix = self._mapped()
+        matrix[row] = predictions.reshape(matrix.shape[1:])
+
+        key, self._next_key = self._next_key, self._next_key + 1
+        self._index[key] = row
+        return key
+
+    def get(self, key: int) -> np.ndarray:
+        """ Return a read-only view of the predictions stored under `key`. """
+        if key not in self._index:
+            raise KeyError(f"No predictions are stored under key {key}.")
+        if self._matrix is None:
+            self._map(mode="r")
+        # A plain ndarray view avoids memmap-specific behavior in numpy operations.
+        row = self._mapped()[self._index[key]]
+        view = row.view(np.ndarray).reshape(self._predictions_shape())
+        view.flags.writeable = False
+        return view
+
+    def remove(self, key: int) -> None:
+        """ Free the row of `key` for reuse, views of it may then be overwritten. """
+        self._free_rows.append(self._index.pop(key))
+
+    def close(self) -> None:
+        """ Release the memory map, predictions can no longer be added afterwards.
+
+        Views returned earlier remain valid, and `get` maps the file read-only.
+        """
+        self._matrix = None
+        self._read_only = True
+
+    def _predictions_shape(self) -> Tuple[int, ...]:
+        if self._shape is None:
+            raise RuntimeError("The store is not initialised, no predictions added.")
+        return self._shape
+
+    def _mapped(self) -> np.memmap:
+        if self._matrix is None:
+            raise RuntimeError("The store is not initialised, no predictions added.")
+        return self._matrix
+
+    def _map(self, mode: str):
+        """ Map the file for `self._capacity` rows, it is extended if needed. """
+        shape = self._predictions_shape()
+        n_samples = shape[0]
+        n_classes = shape[1] if len(shape) == 2 else 1
+        self._matrix = np.memmap(
+            self._file,
+            dtype=np.float32,
+            mode=mode,
+            shape=(self._capacity, n_samples, n_classes),
+        )
+
+    def _grow(self):
+        """ Double the capacity of the matrix. """
+        old_capacity, self._capacity = self._capacity, 2 * self._capacity
+        self._mapped().flush()
+        # Mapping the same file with a larger shape extends it, the data
+        # in existing rows (and views of them) is unaffected.
+        self._map(mode="r+")
+        self._free_rows = list(reversed(range(old_capacity, self._capacity)))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_matrix"] = None
+        return state
+
+    def __setstate__(self, state):
+        # The file is mapped on the first `get`, as it may have been removed since.
+        self.__dict__.update(state)
+        self.close()
@@ -0,0 +1,380 @@
+"""
+An AsyncEvaluator which distributes evaluations over worker processes on other
+machines. The main process hosts a broker, a `multiprocessing.managers` server
+which serves the queues of futures over TCP. Worker processes connect to it with:
+
+    python -m gama.utilities.generic.remote_evaluator HOST PORT AUTHKEY -n N
+
+The defaults (e.g. the dataset) are sent to each worker process once, when it connects.
+Futures and their results are pickled, so anyone who can connect to the broker can
+execute arbitrary code on the broker and its workers. The broker therefore only
+listens on localhost by default, and generates a random authkey unless one is given.
+Only make it reachable from other (trusted) machines over a trusted network.
+"""
+import argparse
+import logging
+from multiprocessing.managers import BaseManager, Server
+import multiprocessing
+import queue
+import secrets
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import uuid
+
+from gama.utilities.generic.async_evaluator import AsyncEvaluator, _failed_copy
+
+log = logging.getLogger(__name__)
+
+
+class _Broker:
+    """ Shared with remote worker processes, for what is not a queue.
+
+    Workers report which future they run, and send heartbeats while connected,
+    so that futures of workers which are lost can be found, see `lost_futures`.
+    """
+
+    def __init__(self, defaults: Dict):
+        self._defaults = defaults
+        self._lock = threading.Lock()
+        # Time of the last heartbeat of each worker, by worker id.
+        self._last_seen: Dict[str, float] = {}
+        # Id of the future each busy worker runs, by worker id.
+        self._running: Dict[str, uuid.UUID] = {}
+
+    @property
+    def n_workers(self) -> int:
+        """ int: Number of connected workers, not available through a proxy. """
+        with self._lock:
+            return len(self._last_seen)
+
+    def defaults(self) -> Dict:
+        return self._defaults
+
+    def register_worker(self) -> str:
+        """ Register a new worker and return its id. """
+        worker_id = uuid.uuid4().hex
+        with self._lock:
+            self._last_seen[worker_id] = time.time()
+        return worker_id
+
+    def unregister_worker(self, worker_id: str):
+        with self._lock:
+            self._last_seen.pop(worker_id, None)
+            self._running.pop(worker_id, None)
+
+    def heartbeat(self, worker_id: str):
+        with self._lock:
+            if worker_id in self._last_seen:
+                self._last_seen[worker_id] = time.time()
+
+    def started(self, worker_id: str, future_id: uuid.UUID):
+        with self._lock:
+            self._running[worker_id] = future_id
+
+    def finished(self, worker_id: str):
+        with self._lock:
+            self._running.pop(worker_id, None)
+
+    def lost_futures(self, worker_timeout: float) -> List[uuid.UUID]:
+        """ Unregister workers without recent heartbeat, return their futures' ids. """
+        now = time.time()
+        with self._lock:
+            lost = [
+                worker_id
+                for worker_id, last_seen in self._last_seen.items()
+                if now - last_seen > worker_timeout
+            ]
+            for worker_id in lost:
+                del self._last_seen[worker_id]
+            return [self._running.pop(w) for w in lost if w in self._running]
+
+
+class _BrokerServer(Server):
+    """ A manager server which stops its threads without raising `SystemExit`. """
+
+    def accepter(self):
+        while not self.stop_event.is_set():
+            try:
+                c = self.listener.accept()
+            except OSError:
+                continue
+            t = threading.Thread(target=self.handle_request, args=(c,), daemon=True)
+            t.start()
+
+    def serve_client(self, conn):
+        try:
+            super().serve_client(conn)
+        except SystemExit:
+            pass  # Raised by `Server` when the client disconnects.
+
+
+class _WorkerManager(BaseManager):
+    """ Connects a worker process to the broker of a `RemoteEvaluator`.
+
+    The methods are replaced by `register`, they only declare the proxied types.
+    """
+
+    def input_queue(self) -> queue.Queue:
+        raise NotImplementedError
+
+    def output_queue(self) -> queue.Queue:
+        raise NotImplementedError
+
+    def command_queue(self) -> queue.Queue:
+        raise NotImplementedError
+
+    def broker(self) -> _Broker:
+        raise NotImplementedError
+
+
+for _typeid in ["input_queue", "output_queue", "command_queue", "broker"]:
+    _WorkerManager.register(_typeid)
+
+
+class RemoteEvaluator(AsyncEvaluator):
+    """ Evaluates functions on remote worker processes, which connect over TCP.
+
+    Follows the same `submit`/`wait_next` contract as the AsyncEvaluator.
+    Functions and their arguments must be picklable, and importable by the workers.
+    Features which manage local worker processes are not supported: memory limits,
+    hard timeouts, adaptive workers and killing the worker of a cancelled future.
+
+    Workers send a heartbeat every second. The future of a worker which sends none
+    for `worker_timeout` seconds (e.g. because its machine crashed) is submitted
+    again, to be evaluated by another worker. If that worker is lost too,
+    the future fails with a `RuntimeError`.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        authkey: Optional[bytes] = None,
+        prefetch: int = 2,
+        wait_time_before_forced_shutdown: int = 10,
+        worker_timeout: float = 30,
+        defaults: Optional[Dict] = None,
+    ):
+        """
+        Parameters
+        ----------
+        address: Tuple[str, int] (default=("127.0.0.1", 0))
+            Host and port for the broker to listen on, by default any free port on
+            localhost. The address in use is available as `address` on enter.
+            Use e.g. ("", port) to accept workers from other machines.
+        authkey: bytes, optional (default=None)
+            Key which workers need to connect to the broker.
+            If None, a random key is generated, available as `authkey`.
+        prefetch : int (default=2)
+            Number of futures to keep queued in addition to one per worker.
+        wait_time_before_forced_shutdown : int (default=10)
+            Number of seconds to wait for connected workers to stop on exit.
+        worker_timeout : float (default=30)
+            Number of seconds without heartbeat after which a worker is considered
+            lost, and the future it was running is submitted again.
+        defaults : Dict, optional (default=None)
+            Default keyword arguments of all submitted functions.
+            If None, the class attribute `defaults` is used.
+        """
+        super().__init__(
+            n_workers=0,
+            logfile=None,
+            prefetch=prefetch,
+            wait_time_before_forced_shutdown=wait_time_before_forced_shutdown,
+            defaults=defaults,
+        )
+        self.address = address
+        self.authkey = (
+            authkey if authkey is not None else secrets.token_hex(32).encode()
+        )
+        self._worker_timeout = worker_timeout
+        self._broker: Optional[_Broker] = None
+        self._server: Optional[_BrokerServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+        # Futures which were submitted again because their worker was lost.
+        self._requeued: set = set()
+
+    def __enter__(self):
+        self._enter()
+
+        # Only the broker uses these queues across processes.
+        self._input, self._output, self._command = (
+            queue.Queue(),
+            queue.Queue(),
+            queue.Queue(),
+        )
+        self._broker = _Broker(dict(self._get_defaults()))
+
+        # Registered per instance, as the callables return this instance's queues.
+        manager_class = type("_BrokerManager", (BaseManager,), {})
+        manager_class.register("input_queue", callable=lambda: self._input)
+        manager_class.register("output_queue", callable=lambda: self._output)
+        manager_class.register("command_queue", callable=lambda: self._command)
+        manager_class.register("broker", callable=lambda: self._broker)
+        # `BaseManager.get_server` always creates a plain `Server`.
+        registry = getattr(manager_class, "_registry")
+        self._server = _BrokerServer(registry, self.address, self.authkey, "pickle")
+        self.address = self._server.address
+        self._server_thread = threading.Thread(
+            target=self._serve, name="gama-broker", daemon=True
+        )
+        self._server_thread.start()
+        log.info(f"Broker is waiting for remote workers on {self.address}.")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        n_workers = self._connected_broker.n_workers
+        log.debug(f"Signaling {n_workers} remote workers to stop.")
+        for _ in range(n_workers):
+            self._command.put("stop")
+
+        for _ in range(self._wait_time_before_forced_shutdown + 1):
+            if self._command.empty():
+                break
+            time.sleep(1)
+        self._stop_server()
+        return False
+
+    def _serve(self):
+        try:
+            self._server.serve_forever()
+        except SystemExit:
+            pass  # `serve_forever` always ends with `sys.exit`.
+
+    def _stop_server(self):
+        """ Stop the threads of the server, and close its listener. """
+        if self._server is None:
+            return
+        self._server.stop_event.set()
+        # The accepter thread only notices the stop event after a connection.
+        host, port = self.address
+        try:
+            socket.create_connection((host or "127.0.0.1", port), timeout=1).close()
+        except OSError:
+            pass
+        if self._server_thread is not None:
+            self._server_thread.join()
+        self._server.listener.close()
+
+    @property
+    def _connected_broker(self) -> _Broker:
+        if self._broker is None:
+            raise RuntimeError("RemoteEvaluator must be used as context manager.")
+        return self._broker
+
+    @property
+    def queue_depth(self) -> int:
+        """ int: Number of futures which should be queued or running at any time. """
+        return self._connected_broker.n_workers + self._prefetch
+
+    def _get_completed(self, block: bool, timeout: Optional[float] = None):
+        self._requeue_lost_futures()
+        return super()._get_completed(block, timeout)
+
+    def _requeue_lost_futures(self):
+        """ Submit the futures of lost workers again, or fail them if lost twice. """
+        for future_id in self._connected_broker.lost_futures(self._worker_timeout):
+            future = self.futures.get(future_id)
+            if future is None or future_id in self._cancelled:
+                continue
+            if future_id in self._requeued:
+                log.warning(f"Lost the workers of {future_id} twice, it failed.")
+                error = RuntimeError("The worker was lost twice.")
+                self._output.put(_failed_copy(future, error))
+            else:
+                log.warning(f"Lost the worker of {future_id}, submitting it again.")
+                self._requeued.add(future_id)
+                self._input.put(future)
+
+
+def _send_heartbeats(
+    address: Tuple[str, int],
+    authkey: bytes,
+    worker_id: str,
+    interval: float,
+    stop: threading.Event,
+):
+    """ Send heartbeats over a separate connection, also while a future runs. """
+    try:
+        manager = _WorkerManager(address=address, authkey=authkey)
+        manager.connect()
+        broker = manager.broker()
+        while not stop.wait(interval):
+            broker.heartbeat(worker_id)
+    except (EOFError, OSError):
+        pass  # The broker is gone.
+
+
+def remote_worker(address: Tuple[str, int], authkey: bytes, poll_time: float = 1.0):
+    """ Evaluate futures from the broker at `address` until it signals to stop.
+
+    A heartbeat is sent every `poll_time` seconds, see `RemoteEvaluator`.
+    """
+    manager = _WorkerManager(address=address, authkey=authkey)
+    manager.connect()
+    input_queue = manager.input_queue()
+    output_queue = manager.output_queue()
+    command_queue = manager.command_queue()
+    broker = manager.broker()
+    default_parameters = broker.defaults()
+    worker_id = broker.register_worker()
+    stop_heartbeats = threading.Event()
+    threading.Thread(
+        target=_send_heartbeats,
+        args=(address, authkey, worker_id, poll_time, stop_heartbeats),
+        daemon=True,
+    ).start()
+    try:
+        while True:
+            try:
+                command_queue.get(block=False)
+                break
+            except queue.Empty:
+                pass
+
+            try:
+                future = input_queue.get(block=True, timeout=poll_time)
+            except queue.Empty:
+                continue
+            broker.started(worker_id, future.id)
+            future.execute(default_parameters)
+            output_queue.put(future)
+            broker.finished(worker_id)
+    finally:
+        stop_heartbeats.set()
+        try:
+            broker.unregister_worker(worker_id)
+        except (EOFError, OSError):
+            pass  # The broker is gone.
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Start worker processes for a RemoteEvaluator."
+    )
+    parser.add_argument("host", type=str, help="Host of the broker.")
+    parser.add_argument("port", type=int, help="Port of the broker.")
+    parser.add_argument("authkey", type=str, help="Key to connect to the broker.")
+    parser.add_argument(
+        "-n",
+        dest="n_workers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="Number of worker processes to start (default: number of cores).",
+    )
+    args = parser.parse_args()
+
+    address, authkey = (args.host, args.port), args.authkey.encode()
+    workers = [
+        multiprocessing.Process(target=remote_worker, args=(address, authkey))
+        for _ in range(args.n_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+""" Share (large) pandas and numpy data between processes through memory-mapped files.
+
+Pickling a 5GB DataFrame to every worker process is slow and leaves each process with
+its own copy. Instead, the data is written once to (memory-mapped) files, and only a
+small `SharedData` handle is pickled. Each process can then reconstruct the data
+with `SharedData.load`, which maps the files into memory read-only.
+Because the operating system shares the pages of mapped files between processes,
+the data is only kept in memory once.
+"""
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_categorical_dtype
+from pandas.core.internals import BlockManager, make_block
+
+
+# Numpy dtype kinds which can be written to, and read from, a memory-mapped file.
+_MEMMAP_KINDS = "biufc"
+
+
+def _can_memmap(dtype) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind in _MEMMAP_KINDS
+
+
+class SharedData:
+    """ Picklable handle to pandas or numpy data stored in memory-mapped files.
+
+    Columns with numeric dtypes are stored in memory-mapped files.
+    Categorical columns have their codes stored in memory-mapped files,
+    while their categories are kept in the handle.
+    Any other column (e.g. of dtype object) is kept in the handle and pickled as usual.
+
+    Parameters
+    ----------
+    data: pandas.DataFrame, pandas.Series or numpy.ndarray
+        The data to share.
+    directory: str
+        Directory in which to create the memory-mapped files.
+        The directory should be accessible by all processes which call `load`.
+    """
+
+    def __init__(
+        self, data: Union[pd.DataFrame, pd.Series, np.ndarray], directory: str
+    ):
+        self._directory = directory
+        self._files: List[str] = []
+        self._index: Optional[pd.Index] = None
+        self._name: Any = None
+        self._columns: Optional[pd.Index] = None
+        # Each block is (column positions, kind, specification), see `_store_column`.
+        self._blocks: List[Tuple[List[int], str, Any]] = []
+
+        if isinstance(data, pd.DataFrame):
+            self._kind = "frame"
+            self._index, self._columns = data.index, data.columns
+            self._store_frame(data)
+        elif isinstance(data, pd.Series):
+            self._kind = "series"
+            self._index, self._name = data.index, data.name
+            self._blocks.append(([0], *self._store_column(data)))
+        elif isinstance(data, np.ndarray):
+            self._kind = "ndarray"
+            self._blocks.append(([0], *self._store_column(data)))
+        else:
+            raise TypeError(f"Can not share data of type {type(data)}.")
+
+    @property
+    def nbytes(self) -> int:
+        """ int: Number of bytes stored in memory-mapped files. """
+        return sum(os.path.getsize(file) for file in self._files)
+
+    def _write(self, array: np.ndarray) -> Tuple[str, str, Tuple[int, ...], str]:
+        """ Write `array` to a new file and return the specification to map it. """
+        file = os.path.join(self._directory, f"{uuid.uuid4()}.dat")
+        order = "F" if array.ndim == 2 else "C"
+        mm: np.memmap = np.memmap(
+            file, dtype=array.dtype, mode="w+", shape=array.shape, order=order
+        )
+        mm[:] = array
+        mm.flush()
+        del mm
+        self._files.append(file)
+        return file, array.dtype.str, array.shape, order
+
+    def _store_column(self, data: Union[pd.Series, np.ndarray]) -> Tuple[str, Any]:
+        if is_categorical_dtype(data.dtype):
+            assert isinstance(data, pd.Series), "Numpy arrays are not categorical."
+            categorical = data.values
+            spec = (self._write(categorical.codes), categorical.categories)
+            return "categorical", (*spec, categorical.ordered)
+        if _can_memmap(data.dtype):
+            return "memmap", self._write(np.asarray(data))
+        return "pickled", data
+
+    def _store_frame(self, data: pd.DataFrame):
+        # Columns which share a numeric dtype are stored together,
+        # this allows frames with a single dtype to be loaded without any copy.
+        positions_by_dtype: Dict[np.dtype, List[int]] = {}
+        for i, dtype in enumerate(data.dtypes):
+            if _can_memmap(dtype):
+                positions_by_dtype.setdefault(dtype, []).append(i)
+            else:
+                self._blocks.append(([i], *self._store_column(data.iloc[:, i])))
+
+        for dtype, positions in positions_by_dtype.items():
+            values = data.iloc[:, positions].to_numpy(dtype=dtype)
+            self._blocks.append((positions, "memmap", self._write(values)))
+
+    @staticmethod
+    def _map(spec: Tuple[str, str, Tuple[int, ...], str]) -> np.ndarray:
+        file, dtype, shape, order = spec
+        mm: np.memmap = np.memmap(
+            file, dtype=np.dtype(dtype), mode="r", shape=shape, order=order
+        )
+        # A plain ndarray view avoids memmap-specific behavior in numpy operations.
+        return np.asarray(mm)
+
+    def _load_block(self, kind: str, spec: Any):
+        if kind == "memmap":
+            return self._map(spec)
+        if kind == "categorical":
+            codes, categories, ordered = spec
+            return pd.Categorical.from_codes(
+                self._map(codes), categories=categories, ordered=ordered
+            )
+        return spec  # pickled
+
+    def load(self) -> Union[pd.DataFrame, pd.Series, np.ndarray]:
+        """ Reconstruct the shared data from the memory-mapped files.
+
+        Numeric data is returned as read-only views on the memory-mapped files.
+        Only columns which are pickled (e.g. of dtype object) are private copies.
+        """
+        if self._kind == "ndarray":
+            [(_, kind, spec)] = self._blocks
+            return self._load_block(kind, spec)
+        if self._kind == "series":
+            [(_, kind, spec)] = self._blocks
+            values = self._load_block(kind, spec)
+            if isinstance(values, pd.Series):
+                return values
+            return pd.Series(values, index=self._index, name=self._name, copy=False)
+
+        # The frame is assembled from its blocks directly, as the DataFrame
+        # constructor (and `pd.concat`) consolidate blocks into new copies.
+        blocks = []
+        for positions, kind, spec in self._blocks:
+            values = self._load_block(kind, spec)
+            if kind == "memmap":
+                # Blocks hold one row per column, the transpose is a view.
+                values = values.T
+            elif isinstance(values, pd.Series):
+                values = values.array
+            blocks.append(make_block(values, placement=positions, ndim=2))
+        manager = BlockManager(blocks, axes=[self._columns, self._index])
+        return pd.DataFrame(manager)
+
+
+def share_if_large(
+    value: Any, directory: str, threshold_mb: Optional[float]
+) -> Union[Any, SharedData]:
+    """ Wrap `value` in a SharedData handle if it is pandas or numpy data that is large.
+
+    Parameters
+    ----------
+    value: Any
+        The value to (possibly) share.
+    directory: str
+        Directory to write the memory-mapped files to.
+    threshold_mb: float, optional
+        Only share data that is larger than this many megabytes.
+        If None, the data is never shared.
+
+    Returns
+    -------
+    Any or SharedData
+        `value` or a SharedData handle to it.
+    """
+    if threshold_mb is None:
+        return value
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        nbytes = value.memory_usage(deep=False)
+        nbytes = nbytes.sum() if isinstance(nbytes, pd.Series) else nbytes
+    elif isinstance(value, np.ndarray):
+        nbytes = value.nbytes
+    else:
+        return value
+
+    if nbytes < threshold_mb * (2 ** 20):
+        return value
+    return SharedData(value, directory)
+
+
+def load_shared(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """ Return a copy of `parameters` with each SharedData handle loaded. """
+    return {
+        name: value.load() if isinstance(value, SharedData) else value
+        for name, value in parameters.items()
+    }
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+from gama import GamaClassifier
+from gama.configuration.testconfiguration import clf_config
+from gama.genetic_programming.components import Fitness
+from gama.search_methods.async_ea import _prune_threshold
+
+
+@pytest.fixture
+def pset(tmp_path):
+    """ Overrides the fixture of conftest, so no output directory is left behind. """
+    gc = GamaClassifier(
+        config=clf_config, store="nothing", output_directory=str(tmp_path / "gama")
+    )
+    yield gc._pset
+    gc.cleanup("all")
+
+
+def _with_score(individual, score):
+    individual.fitness = Fitness((score, -1), datetime.now(), 0, 0)
+    return individual
+
+
+def test_prune_threshold_has_margin_below_worst_score(GNB, RS_MNB):
+    """ The threshold is `margin` times the absolute worst score below it. """
+    population = [_with_score(GNB, 0.8), _with_score(RS_MNB, 0.9)]
+    assert 0.72 == pytest.approx(_prune_threshold(population, margin=0.1))
+
+    population = [_with_score(GNB, -0.5), _with_score(RS_MNB, -0.2)]
+    assert -0.55 == pytest.approx(_prune_threshold(population, margin=0.1))
+
+
+def test_prune_threshold_ignores_non_finite_scores(GNB, RS_MNB, SS_BNB):
+    """ Failed evaluations (-inf) or unevaluated individuals do not disable pruning. """
+    SS_BNB.fitness = None
+    population = [_with_score(GNB, float("-inf")), _with_score(RS_MNB, 0.8), SS_BNB]
+    assert 0.8 == pytest.approx(_prune_threshold(population, margin=0))
+    assert _prune_threshold([GNB, SS_BNB], margin=0) is None
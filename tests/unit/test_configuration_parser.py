@@ -1,6 +1,13 @@
+from collections import defaultdict
+
+import pytest
 from sklearn.naive_bayes import BernoulliNB, GaussianNB
 
-from gama.configuration.parser import merge_configurations
+from gama.configuration.parser import merge_configurations, pset_from_config
+from gama.genetic_programming.components.primitive_node import (
+    find_primitive,
+    find_terminal,
+)
 
 
 def test_merge_configuration():
@@ -16,3 +23,31 @@ def test_merge_configuration():
 
     actual_merged = merge_configurations(one, two)
     assert expected_merged == actual_merged
+
+
+def test_pset_from_config_finds_primitives_and_terminals_by_string():
+    """ The PrimitiveSet indexes Primitives and Terminals by their repr. """
+    config = {"alpha": [0, 1], BernoulliNB: {"alpha": [], "fit_prior": [True]}}
+    pset, _ = pset_from_config(config)
+
+    assert pset.find_primitive("BernoulliNB") == pset["prediction"][0]
+    assert pset.find_terminal("alpha=1") == pset["alpha"][1]
+    assert pset.find_terminal("BernoulliNB.fit_prior=True") is not None
+    assert pset.find_terminal("alpha=2") is None
+
+    pset["prediction"] = []  # Assigning a key rebuilds the index on lookup.
+    assert pset.find_primitive("BernoulliNB") is None
+
+
+def test_find_primitive_and_terminal_raise_if_not_found():
+    """ Lookups fail with a ValueError for a PrimitiveSet and a plain defaultdict. """
+    config = {"alpha": [0, 1], BernoulliNB: {"alpha": [], "fit_prior": [True]}}
+    pset, _ = pset_from_config(config)
+
+    for primitive_set in [pset, defaultdict(list, pset)]:
+        assert find_primitive(primitive_set, "BernoulliNB") == pset["prediction"][0]
+        assert find_terminal(primitive_set, "alpha=1") == pset["alpha"][1]
+        with pytest.raises(ValueError):
+            find_primitive(primitive_set, "GaussianNB")
+        with pytest.raises(ValueError):
+            find_terminal(primitive_set, "alpha=2")
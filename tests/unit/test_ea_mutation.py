@@ -48,6 +48,17 @@ def test_mut_insert(ForestPipeline, pset):
     _test_mutation(ForestPipeline, mut_insert, _mut_insert_is_applied, pset)
 
 
+def test_mutation_invalidates_key(ForestPipeline, pset):
+    """ The key of a mutated individual matches that of its pipeline string. """
+    for mutation in [mut_replace_terminal, mut_replace_primitive, mut_insert]:
+        individual = ForestPipeline.copy_as_new()
+        key_before = individual.key
+        mutation(individual, pset)
+        from_string = Individual.from_string(individual.pipeline_str(), pset)
+        assert individual.key != key_before
+        assert individual.key == from_string.key
+
+
 def test_random_valid_mutation_with_all(ForestPipeline, pset):
     """ Test if a valid mutation is applied at random.
 
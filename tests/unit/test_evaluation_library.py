@@ -1,5 +1,7 @@
+import os
 from typing import Optional, Tuple, List, Union
 import uuid
+
 import numpy as np
 import pandas as pd
 
@@ -119,6 +121,50 @@ def test_evaluation_library_n_best(GNB):
         lib.clear_cache()
 
 
+def test_evaluation_library_removes_discarded_estimators_from_disk(GNB, RS_MNB, SS_BNB):
+    """ Estimators written to disk by the worker are removed if not kept. """
+    lib = EvaluationLibrary(m=1, sample=None, cache=_short_name())
+
+    try:
+        individuals = [GNB, RS_MNB, SS_BNB]
+        best, worst, failed = [_mock_evaluation(i, estimators=[1]) for i in individuals]
+        best.score, worst.score = (1.0, 1.0, 1.0), (0.0, 0.0, 0.0)
+        failed.error = "Not a full evaluation."
+        for evaluation in [best, worst, failed]:
+            evaluation.estimators_to_disk(lib._cache)
+        discarded_files = [worst._estimators_file, failed._estimators_file]
+        for evaluation in [best, worst, failed]:
+            lib.save_evaluation(evaluation)
+
+        assert [1] == best.estimators, "The best evaluation keeps its estimators."
+        assert not worst.estimators and not failed.estimators
+        assert not any(os.path.exists(file) for file in discarded_files)
+    finally:
+        lib.clear_cache()
+
+
+def test_evaluation_library_stores_predictions_of_top_m(GNB, RS_MNB, SS_BNB):
+    """ Predictions of the top `m` are stored in the library's `PredictionStore`. """
+    lib = EvaluationLibrary(m=2, sample=None, cache=_short_name())
+
+    try:
+        scores = [(0.5, 0.5, 0.5), (1.0, 1.0, 1.0), (0.0, 0.0, 0.0)]
+        evaluations = [
+            _mock_evaluation(individual, np.full(30, score[0]), score)
+            for individual, score in zip([GNB, RS_MNB, SS_BNB], scores)
+        ]
+        for evaluation in evaluations:
+            lib.save_evaluation(evaluation)
+
+        assert 2 == len(lib._prediction_store)
+        for evaluation, (score, _, _) in zip(evaluations[:2], scores):
+            assert evaluation._prediction_key in lib._prediction_store
+            assert np.all(evaluation.predictions == score)
+        assert evaluations[2].predictions is None
+    finally:
+        lib.clear_cache()
+
+
 def _test_subsample(sample, predictions, subsample, individual):
     """ Test the `predictions` correctly get sampled to `subsample`. """
     lib = EvaluationLibrary(sample=sample, cache=_short_name())
@@ -129,8 +175,9 @@ def _test_subsample(sample, predictions, subsample, individual):
         assert (
             subsample.shape == best_evaluation.predictions.shape
         ), "Subsample does not have expected shape."
+        # Stored predictions are float32, see `PredictionStore`.
         assert np.array_equal(
-            subsample, best_evaluation.predictions
+            np.asarray(subsample, dtype=np.float32), best_evaluation.predictions
         ), "Content of subsample differs from expected."
     finally:
         lib.clear_cache()
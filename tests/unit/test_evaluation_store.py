@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from gama.genetic_programming.components import Fitness
+from gama.utilities.evaluation_library import Evaluation
+from gama.utilities.evaluation_store import EvaluationStore, dataset_fingerprint
+
+
+def test_dataset_fingerprint_changes_with_data_and_folds():
+    x, y = pd.DataFrame(np.arange(20).reshape(10, 2)), pd.Series(np.arange(10) % 2)
+    folds = np.arange(10) % 5
+    fingerprint = dataset_fingerprint(x, y, folds, extra=["accuracy"])
+
+    assert fingerprint == dataset_fingerprint(x.copy(), y.copy(), folds, ["accuracy"])
+    assert fingerprint != dataset_fingerprint(x, 1 - y, folds, ["accuracy"])
+    assert fingerprint != dataset_fingerprint(x, y, folds[::-1], ["accuracy"])
+    assert fingerprint != dataset_fingerprint(x, y, folds, ["neg_log_loss"])
+
+
+def test_evaluation_store_persists_evaluations(tmp_path, GNB, RS_MNB):
+    """ Evaluations are loaded from disk only for the same fingerprint. """
+    path = str(tmp_path / "evaluations.db")
+    store = EvaluationStore(path, store_models=True)
+    store.fingerprint = "data"
+    GNB.fitness = Fitness((0.5, -1), None, 2.0, 1.5)
+    store.save(Evaluation(GNB, predictions=np.zeros(10), score=(0.5, -1)))
+    store.close()
+
+    store = EvaluationStore(path)
+    store.fingerprint = "data"
+    assert GNB in store
+    assert RS_MNB not in store
+    GNB.fitness = None
+    evaluation = store.load(GNB)
+    assert evaluation.score == (0.5, -1)
+    assert evaluation.predictions.shape == (10,)
+    assert GNB.fitness.values == (0.5, -1)
+    assert GNB.fitness.process_time == 1.5
+
+    store.fingerprint = "other data"
+    assert GNB not in store
+    assert store.load(GNB) is None
+
+
+def test_evaluation_store_skips_pruned_and_timed_out_evaluations(tmp_path, GNB):
+    store = EvaluationStore(str(tmp_path / "evaluations.db"))
+    store.fingerprint = "data"
+    store.save(Evaluation(GNB, score=(0.1, -1), pruned=True))
+    store.save(Evaluation(GNB, error="<class 'stopit.utils.TimeoutException'> "))
+    assert GNB not in store
+
+
+def test_evaluation_store_skips_unfitted_evaluations_if_required(tmp_path, GNB):
+    """ Evaluations stored without predictions can't be used to build ensembles. """
+    path = str(tmp_path / "evaluations.db")
+    with EvaluationStore(path, store_models=True) as store:
+        store.fingerprint = "data"
+        store.save(Evaluation(GNB, score=(0.5, -1)))
+        assert GNB in store
+
+        store.requires_fitted = True
+        assert GNB not in store
+        assert store.load(GNB) is None
+
+        store.save(Evaluation(GNB, predictions=np.zeros(10), score=(0.5, -1)))
+        assert store.load(GNB).predictions.shape == (10,)
+    assert store._connection is None
+
+
+def test_evaluation_store_does_not_store_models_by_default(tmp_path, GNB):
+    """ Evaluations are loaded without models, unless `store_models` is set. """
+    with EvaluationStore(str(tmp_path / "evaluations.db")) as store:
+        store.fingerprint = "data"
+        GNB.fitness = Fitness((0.5, -1), None, 2.0, 1.5)
+        store.save(Evaluation(GNB, predictions=np.zeros(10), score=(0.5, -1)))
+        evaluation = store.load(GNB)
+        assert evaluation.score == (0.5, -1)
+        assert evaluation.predictions is None and [] == evaluation.estimators
+
+        store.requires_fitted = True
+        assert GNB not in store
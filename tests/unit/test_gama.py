@@ -1,6 +1,11 @@
 import pytest
 
 import gama
+from gama.utilities.generic.async_evaluator import AsyncEvaluator
+from gama.utilities.generic.in_process_evaluator import (
+    SerialEvaluator,
+    ThreadEvaluator,
+)
 
 
 def test_reproducible_initialization():
@@ -32,3 +37,37 @@ def test_gama_fail_on_invalid_hyperparameter_values():
     with pytest.raises(ValueError) as e:
         gama.GamaClassifier(n_jobs=-2, store="nothing")
     assert "n_jobs should be -1 or positive int but is" in str(e.value)
+
+    with pytest.raises(ValueError) as e:
+        gama.GamaClassifier(executor="gpu", store="nothing")
+    assert "executor should be callable or one of" in str(e.value)
+
+
+def test_gama_instances_create_their_own_executor():
+    """ Settings of one instance do not affect the executor of another. """
+    g1 = gama.GamaClassifier(n_jobs=3, store="nothing")
+    g2 = gama.GamaClassifier(n_jobs=2, executor="threads", store="nothing")
+    async_ = g1._operator_set.executor()
+    assert isinstance(async_, AsyncEvaluator) and async_._n_jobs == 3
+    assert not async_._adaptive_workers, "The configured `n_jobs` should be used."
+    threads = g2._operator_set.executor()
+    assert isinstance(threads, ThreadEvaluator) and threads._n_workers == 2
+    g1.cleanup("all")
+    g2.cleanup("all")
+
+
+def test_gama_evaluates_in_subprocesses_by_default():
+    """ Only subprocesses enforce memory limits, also with one job. """
+    g = gama.GamaClassifier(n_jobs=1, max_memory_mb=1000, store="nothing")
+    async_ = g._operator_set.executor()
+    assert isinstance(async_, AsyncEvaluator)
+    assert async_._memory_limit_mb == 1000
+    assert async_._worker_memory_limit_mb is None, "RLIMIT_AS should be opt-in."
+    g.cleanup("all")
+
+
+def test_gama_warns_in_process_executors_do_not_limit_resources(caplog):
+    g = gama.GamaClassifier(n_jobs=1, executor="serial", store="nothing")
+    assert isinstance(g._operator_set.executor(), SerialEvaluator)
+    assert "`max_memory_mb` is not enforced" in caplog.text
+    g.cleanup("all")
@@ -1,8 +1,16 @@
+import random
 from typing import List, Tuple
+
+import numpy as np
+
 from gama.genetic_programming.nsga2 import (
     NSGAMeta,
     fast_non_dominated_sort,
     crowding_distance_assignment,
+    crowding_distances,
+    non_dominated_ranks,
+    nsga2,
+    RankedPopulation,
 )
 
 
@@ -68,3 +76,83 @@ def test_crowd_compare():
 
     assert all([three_five.crowd_compare(other) == -1 for other in pareto[2:]])
     assert all([five_three.crowd_compare(other) == -1 for other in pareto[2:]])
+
+
+def test_non_dominated_ranks():
+    values = np.array([(3, 5), (5, 3), (2, 4), (4, 4), (1, 1), (2, 2)])
+    assert [1, 1, 2, 1, 3, 2] == list(non_dominated_ranks(values))
+
+
+def test_crowding_distances_matches_crowding_distance_assignment():
+    values = [(3, float("inf")), (5, 3), (4, 4), (4.5, 3.5), (3.5, 4.5)]
+    pareto = _tuples_to_NSGAMeta(values)
+    crowding_distance_assignment(pareto)
+    vectorized_distances = crowding_distances(np.array(values))
+    assert [p.distance for p in pareto] == list(vectorized_distances)
+
+
+def test_nsga2_vectorized_selects_same_fronts():
+    """ Both implementations select the same individuals from whole fronts. """
+    values = [(3, 5), (5, 3), (2, 4), (4, 4), (1, 1), (2, 2), (0, 0)]
+    metrics = [lambda x: x[0], lambda x: x[1]]
+    for n in [3, 4, 6]:
+        selection = nsga2(values, n, metrics, vectorized=False)
+        vectorized_selection = nsga2(values, n, metrics, vectorized=True)
+        assert set(selection) == set(vectorized_selection)
+
+
+def test_nsga2_ranks_count_fronts_from_one():
+    """ Each front has its own rank, in both implementations. """
+    values = [(1, 1), (3, 3), (2, 2), (3, 0)]
+    metrics = [lambda x: x[0], lambda x: x[1]]
+    for vectorized in [False, True]:
+        selection = nsga2(values, 4, metrics, return_meta=True, vectorized=vectorized)
+        ranks = {meta.obj: meta.rank for meta in selection}
+        assert {(3, 3): 1, (3, 0): 1, (2, 2): 2, (1, 1): 3} == ranks
+
+
+def test_nsga2_vectorized_selects_same_when_front_is_split():
+    """ If the cut-off splits a front, its least crowded individuals are selected. """
+    front = [(0, 10), (1, 8), (4, 7), (5, 3), (10, 0)]
+    dominated_front = [(x - 1, y - 1) for x, y in front]
+    values = dominated_front + front
+    metrics = [lambda x: x[0], lambda x: x[1]]
+
+    assert {(0, 10), (10, 0), (5, 3)} == set(nsga2(values, 3, metrics))
+    # For n=1 and n=6, the selection from the two extremes of a front is arbitrary.
+    for n in [2, 3, 4, 5, 7, 8, 9, 10]:
+        selection = nsga2(values, n, metrics, vectorized=False)
+        vectorized_selection = nsga2(values, n, metrics, vectorized=True)
+        assert set(selection) == set(vectorized_selection)
+
+
+def test_ranked_population_matches_full_sort_after_updates():
+    """ Fronts and crowding distances stay correct over additions and removals. """
+    random.seed(0)
+    population = RankedPopulation(lambda x: x[1])
+    items = []
+    for i in range(300):
+        if len(items) > 20 and random.random() < 0.5:
+            item = items.pop(random.randrange(len(items)))
+            population.remove(item)
+        else:
+            item = (i, (random.randint(0, 10), -random.randint(1, 4)))
+            items.append(item)
+            population.add(item)
+
+        assert sorted(population) == sorted(items)
+        expected_ranks = non_dominated_ranks(np.array([v for _, v in items]))
+        assert [population.rank(item) for item in items] == list(expected_ranks)
+        for front in population.fronts:
+            expected = crowding_distances(np.array([values for _, values in front]))
+            assert [population.distance(item) for item in front] == list(expected)
+
+
+def test_ranked_population_ranks_ties_like_nsga2():
+    """ Items which only tie on an objective do not dominate each other. """
+    values = [(0.9, -2), (0.8, -2), (0.8, -3), (0.9, -1)]
+    population = RankedPopulation(lambda x: x, values)
+    assert [population.rank(v) for v in values] == [1, 2, 2, 1]
+    metrics = [lambda x: x[0], lambda x: x[1]]
+    selected = nsga2(values, n=4, metrics=metrics, return_meta=True, vectorized=False)
+    assert {m.obj: m.rank for m in selected} == {v: population.rank(v) for v in values}
@@ -0,0 +1,33 @@
+from gama.genetic_programming.components import Fitness, Individual
+from gama.utilities.evaluation_library import Evaluation
+
+
+def test_submit_resolves_duplicates_without_evaluation(opset, GNB):
+    """ A pipeline evaluated earlier in the run gets the earlier result. """
+    GNB.fitness = Fitness((0.8, -1), None, 2.0, 1.5)
+    opset._completed_evaluations[GNB.key] = Evaluation(GNB, score=(0.8, -1))
+    duplicate = Individual(GNB.main_node.copy(), GNB._to_pipeline)
+
+    # The AsyncEvaluator is not used, as the evaluation is not submitted.
+    opset.submit(None, duplicate)
+    future = opset.wait_next(None)
+
+    assert future.result.individual is duplicate
+    assert future.result.score == (0.8, -1)
+    assert duplicate.fitness == GNB.fitness
+    assert 1 == opset.n_duplicates
+
+
+def test_wait_completed_returns_all_resolved_futures(opset, GNB, RS_MNB):
+    """ Futures which need no evaluation are all returned at once. """
+    for individual in [GNB, RS_MNB]:
+        individual.fitness = Fitness((0.8, -1), None, 2.0, 1.5)
+        opset._completed_evaluations[individual.key] = Evaluation(
+            individual, score=(0.8, -1)
+        )
+        duplicate = Individual(individual.main_node.copy(), individual._to_pipeline)
+        opset.submit(None, duplicate)
+
+    futures = opset.wait_completed(None)
+    assert 2 == len(futures)
+    assert 2 == opset.n_duplicates
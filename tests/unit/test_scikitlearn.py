@@ -1,10 +1,14 @@
 import pandas as pd
+import pytest
 from sklearn.datasets import load_iris
 from gama.genetic_programming.compilers.scikitlearn import (
     evaluate_individual,
     compile_individual,
     evaluate_pipeline,
+    precompute_folds,
+    EvaluationPruned,
 )
+from gama.utilities.generic.bounded_cache import BoundedCache
 from gama.utilities.metrics import Metric, scoring_to_metric
 
 
@@ -27,6 +31,30 @@ def test_evaluate_individual(SS_BNB):
     assert (individual.fitness.start_time - reported_start_time).total_seconds() < 1.0
 
 
+def test_evaluate_individual_returns_fitted_only_if_needed(SS_BNB, tmp_path):
+    """ The worker writes estimators to disk, or drops them if they are not kept. """
+
+    def fake_evaluate_pipeline(pipeline, *args, **kwargs):
+        return [0.5, 0.5], (1.0,), ["estimator"], None
+
+    evaluation = evaluate_individual(
+        SS_BNB, fake_evaluate_pipeline, estimators_directory=str(tmp_path)
+    )
+    assert [] == evaluation._estimators
+    assert ["estimator"] == evaluation.estimators
+    assert [0.5, 0.5] == evaluation.predictions
+
+    evaluation = evaluate_individual(SS_BNB, fake_evaluate_pipeline, keep_fitted=False)
+    assert [] == evaluation.estimators
+    assert evaluation.predictions is None
+
+    with pytest.raises(OSError):
+        missing_directory = str(tmp_path / "not-shared")
+        evaluate_individual(
+            SS_BNB, fake_evaluate_pipeline, estimators_directory=missing_directory
+        )
+
+
 def test_compile_individual(SS_BNB):
     from sklearn.naive_bayes import BernoulliNB
     from sklearn.preprocessing import StandardScaler, MinMaxScaler
@@ -73,3 +101,70 @@ def test_evaluate_invalid_pipeline(InvalidLinearSVC):
     assert str(error).endswith("penalty='l1', loss='squared_hinge', dual=True")
     assert estimators is None
     assert prediction is None
+
+
+def test_evaluate_pipeline_with_prefix_cache(SS_BNB, SS_RBS_SS_BNB):
+    """ Cached evaluations reuse fitted prefixes and score the same as without. """
+    x, y = load_iris(return_X_y=True)
+    x, y = pd.DataFrame(x), pd.Series(y)
+    metrics = scoring_to_metric(("accuracy", "neg_log_loss"))
+    cache = BoundedCache(max_memory_mb=10)
+
+    _, scores, _, _ = evaluate_pipeline(SS_BNB.pipeline, x, y, 60, metrics)
+    _, cached_scores, estimators, error = evaluate_pipeline(
+        SS_BNB.pipeline, x, y, 60, metrics, prefix_cache=cache
+    )
+    assert error is None
+    assert scores == cached_scores
+    assert 5 == len(estimators) == len(cache)
+    assert 2 == len(estimators[0].steps)
+
+    # A pipeline with the same first step can reuse its fitted transformer.
+    hits = cache.hits
+    prediction, _, estimators, error = evaluate_pipeline(
+        SS_RBS_SS_BNB.pipeline, x, y, 60, metrics, prefix_cache=cache
+    )
+    assert error is None
+    assert 5 == cache.hits - hits
+    assert 4 == len(estimators[0].steps)
+    assert prediction.shape == (150, 3)
+
+
+def test_evaluate_pipeline_with_precomputed_folds(SS_BNB):
+    """ Precomputed stratified folds give the same results as computing them. """
+    x, y = load_iris(return_X_y=True)
+    x, y = pd.DataFrame(x), pd.Series(y)
+    metrics = scoring_to_metric("accuracy")
+
+    folds = precompute_folds(y, cv=5, is_classification=True)
+    assert folds.shape == (150,)
+    assert folds.dtype.itemsize == 1
+    assert all(30 == sum(folds == i) for i in range(5))
+
+    prediction, scores, _, _ = evaluate_pipeline(SS_BNB.pipeline, x, y, 60, metrics)
+    folds_prediction, folds_scores, estimators, error = evaluate_pipeline(
+        SS_BNB.pipeline, x, y, 60, metrics, folds=folds
+    )
+    assert error is None
+    assert 5 == len(estimators)
+    assert scores == folds_scores
+    assert (prediction == folds_prediction).all()
+
+
+def test_evaluate_pipeline_pruned(SS_BNB):
+    """ Evaluation stops after the first fold if it scores below the threshold. """
+    x, y = load_iris(return_X_y=True)
+    x, y = pd.DataFrame(x), pd.Series(y)
+
+    prediction, scores, estimators, error = evaluate_pipeline(
+        SS_BNB.pipeline,
+        x,
+        y,
+        timeout=60,
+        metrics=scoring_to_metric("accuracy"),
+        prune_threshold=1.1,
+    )
+    assert isinstance(error, EvaluationPruned)
+    assert 1 == len(scores) and 0 <= scores[0] <= 1
+    assert estimators is None
+    assert prediction is None
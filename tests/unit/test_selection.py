@@ -1,6 +1,7 @@
 import pytest
 
 from gama.genetic_programming.components import Fitness
+from gama.genetic_programming.nsga2 import RankedPopulation
 from gama.genetic_programming.selection import (
     create_from_population,
     eliminate_from_pareto,
@@ -26,6 +27,11 @@ def test_eliminate_from_pareto(GNB, ForestPipeline, LinearSVC):
     eliminated = eliminate_from_pareto(pop=[ForestPipeline, GNB, LinearSVC], n=1)
     assert eliminated == [GNB], "Individual should be dominated regardless of order."
 
+    population = RankedPopulation(lambda ind: ind.fitness.values[:2])
+    for individual in [ForestPipeline, GNB, LinearSVC]:
+        population.add(individual)
+    assert eliminate_from_pareto(pop=population, n=1) == [GNB]
+
 
 def test_create_from_population(opset, GNB, ForestPipeline, LinearSVC):
     GNB.fitness = Fitness((3, -2), 0, 0, 0)
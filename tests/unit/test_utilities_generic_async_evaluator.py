@@ -0,0 +1,174 @@
+from concurrent.futures import CancelledError
+import os
+import sys
+import time
+
+import pytest
+
+from gama.utilities.generic.async_evaluator import AsyncEvaluator
+
+
+def _return_input(x):
+    return x
+
+
+def _allocate_mb(n):
+    return len(bytearray(n * 2 ** 20))
+
+
+def test_wait_next_does_not_wait_for_poll_time():
+    """ A completed future is returned as soon as it is available. """
+    with AsyncEvaluator(n_workers=1, logfile=None) as async_:
+        async_.submit(_return_input, 1)
+        async_.wait_next()  # first evaluation includes process start-up
+        async_.submit(_return_input, 2)
+        start = time.time()
+        future = async_.wait_next(poll_time=5)
+        assert time.time() - start < 5
+    assert future.result == 2
+
+
+def test_memory_is_logged_by_monitor(tmp_path):
+    """ The monitor thread logs memory usage while waiting on results. """
+    logfile = os.path.join(str(tmp_path), "memory.log")
+    with AsyncEvaluator(n_workers=1, logfile=logfile, monitor_interval=0.1):
+        time.sleep(1)
+    with open(logfile, "r") as fh:
+        assert len(fh.readlines()) > 2
+
+
+def test_idle_workers_do_not_use_cpu():
+    """ Workers block while waiting for futures instead of spinning. """
+    with AsyncEvaluator(n_workers=1, logfile=None) as async_:
+        async_.submit(_return_input, 1)
+        async_.wait_next()  # make sure the worker has started
+        worker = async_._processes[0]
+        cpu_before = sum(worker.cpu_times()[:2])
+        time.sleep(1)
+        cpu_used = sum(worker.cpu_times()[:2]) - cpu_before
+    assert cpu_used < 0.1
+
+
+def test_completed_futures_returns_all_completed_without_blocking():
+    with AsyncEvaluator(n_workers=1, logfile=None) as async_:
+        assert [] == async_.completed_futures()
+        for i in range(3):
+            async_.submit(_return_input, i)
+        first = async_.wait_next()
+        time.sleep(1)
+        completed = async_.completed_futures()
+    assert [0, 1, 2] == [future.result for future in [first, *completed]]
+    assert {} == async_.futures
+
+
+def test_queue_depth_counts_workers_and_prefetch():
+    with AsyncEvaluator(n_workers=2, logfile=None, prefetch=3) as async_:
+        assert 5 == async_.queue_depth
+        async_.submit(_return_input, 1)
+        assert 1 == async_.n_queued
+        async_.wait_next()
+        assert 0 == async_.n_queued
+
+
+def test_cancel_kills_and_replaces_worker():
+    with AsyncEvaluator(n_workers=1, logfile=None, monitor_interval=0.1) as async_:
+        async_.submit(_return_input, 1)
+        async_.wait_next()  # make sure the worker has started
+        worker = async_._processes[0]
+        future = async_.submit(time.sleep, 60)
+        time.sleep(0.5)
+        assert async_.cancel(future)
+        assert async_.wait_next() is future
+        assert isinstance(future.exception, CancelledError)
+        assert not async_.cancel(future)
+
+        time.sleep(0.5)
+        async_.completed_futures()  # Starts the replacement on the main thread.
+        assert 1 == len(async_._processes)
+        assert worker.pid != async_._processes[0].pid
+        async_.submit(_return_input, 2)
+        assert 2 == async_.wait_next().result
+
+
+def test_hard_timeout_fails_future():
+    """ Evaluations which exceed the hard timeout fail, even if stuck. """
+    with AsyncEvaluator(
+        n_workers=1, logfile=None, monitor_interval=0.1, hard_timeout=1
+    ) as async_:
+        future = async_.submit(time.sleep, 60)
+        start = time.time()
+        assert async_.wait_next() is future
+        assert time.time() - start < 10
+        assert isinstance(future.exception, TimeoutError)
+        async_.submit(_return_input, 2)
+        assert 2 == async_.wait_next().result
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="RLIMIT_AS is enforced on Linux")
+def test_worker_memory_limit_raises_memory_error_in_worker():
+    """ Exceeding the worker memory limit fails the future, not the worker. """
+    with AsyncEvaluator(n_workers=1, logfile=None, worker_memory_limit_mb=200) as ae:
+        ae.submit(_allocate_mb, 50)
+        assert 50 * 2 ** 20 == ae.wait_next().result
+        worker = ae._processes[0]
+
+        future = ae.submit(_allocate_mb, 1000)
+        assert ae.wait_next() is future
+        assert isinstance(future.exception, MemoryError)
+
+        ae.submit(_allocate_mb, 50)
+        assert 50 * 2 ** 20 == ae.wait_next().result
+        assert [worker.pid] == [process.pid for process in ae._processes]
+
+
+def test_workers_are_replaced_after_max_tasks():
+    with AsyncEvaluator(
+        n_workers=1, logfile=None, monitor_interval=0.1, max_tasks_per_worker=2
+    ) as async_:
+        pids = set()
+        for i in range(6):
+            async_.submit(os.getpid)
+            pids.add(async_.wait_next().result)
+        assert 3 == len(pids)
+        time.sleep(0.5)
+        async_.completed_futures()  # Starts the replacement on the main thread.
+        assert 1 == len(async_._processes)
+
+
+def test_adaptive_workers_retire_workers_which_do_not_fit_in_memory(tmp_path):
+    logfile = os.path.join(str(tmp_path), "memory.log")
+    with AsyncEvaluator(
+        n_workers=2,
+        logfile=logfile,
+        memory_limit_mb=1000,
+        adaptive_workers=True,
+        monitor_interval=60,  # Adapt manually instead.
+    ) as async_:
+        # Pretend evaluations were observed to use 600MB each.
+        async_._observed_usage.extend([(600, 1.0)] * 5)
+        async_._last_adapted = 0
+        async_._adapt_workers()
+        time.sleep(1)
+        async_._process_worker_events()
+        assert 1 == len(async_._processes)
+        async_.submit(_return_input, 1)
+        assert 1 == async_.wait_next().result
+    with open(logfile, "r") as fh:
+        assert "Scaling from 2 to 1 workers" in fh.read()
+
+
+def test_workers_are_started_on_the_main_thread():
+    """ Workers which replace killed workers are not forked by the monitor thread. """
+    with AsyncEvaluator(n_workers=1, logfile=None, monitor_interval=0.1) as async_:
+        worker = async_._processes[0]
+        future = async_.submit(time.sleep, 60)
+        time.sleep(0.5)
+        async_.cancel(future)
+        time.sleep(0.5)
+        assert [] == async_._processes, "The monitor should only request a worker."
+        assert 1 == async_._n_requested_workers
+        assert 3 == async_.queue_depth, "Requested workers count towards the depth."
+
+        assert async_.wait_next() is future
+        assert 1 == len(async_._processes)
+        assert worker.pid != async_._processes[0].pid
@@ -0,0 +1,40 @@
+import pickle
+
+import numpy as np
+
+from gama.utilities.generic.bounded_cache import BoundedCache, approximate_size
+
+
+def test_bounded_cache_evicts_least_recently_used():
+    """ Least recently used entries are evicted first to stay within budget. """
+    cache = BoundedCache(max_memory_mb=1)
+    half_mb = np.zeros(2 ** 16)  # 8 bytes * 2**16 = 0.5MB
+    assert approximate_size(half_mb) == 2 ** 19
+
+    cache.put("a", half_mb)
+    cache.put("b", half_mb)
+    assert cache.get("a") is half_mb  # "b" is now least recently used
+    cache.put("c", half_mb)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.nbytes == 2 ** 20
+
+
+def test_bounded_cache_does_not_store_values_over_budget():
+    """ A value that exceeds the budget by itself is not stored. """
+    cache = BoundedCache(max_memory_mb=1)
+    assert not cache.put("big", np.zeros(2 ** 18))
+    assert len(cache) == 0
+    assert cache.get("big", "default") == "default"
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_bounded_cache_can_be_pickled():
+    """ The cache is sent to subprocesses, which get an independent copy. """
+    cache = BoundedCache(max_memory_mb=1)
+    cache.put("a", np.zeros(8))
+    copy = pickle.loads(pickle.dumps(cache))
+    copy.put("b", np.zeros(8))
+    assert "a" in copy and "b" in copy
+    assert "b" not in cache
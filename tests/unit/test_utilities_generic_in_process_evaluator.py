@@ -0,0 +1,127 @@
+from concurrent.futures import CancelledError
+from functools import partial
+import threading
+import time
+
+import pytest
+
+from gama.utilities.generic.in_process_evaluator import (
+    SerialEvaluator,
+    ThreadEvaluator,
+)
+
+
+def _add(x, y=0):
+    return x + y
+
+
+def _append(x, log):
+    log.append(x)
+    return x
+
+
+def _wait_for(event, started=None):
+    if started is not None:
+        started.set()
+    event.wait(5)
+    return "done"
+
+
+def _wait_and_append(x, log, event, started):
+    _wait_for(event, started)
+    return _append(x, log)
+
+
+def test_serial_evaluator_evaluates_in_submission_order_with_defaults():
+    with SerialEvaluator(defaults=dict(y=10)) as serial:
+        assert serial.queue_depth == 1
+        for i in range(3):
+            serial.submit(_add, i)
+        assert [10, 11, 12] == [serial.wait_next().result for _ in range(3)]
+        assert serial.n_queued == 0
+        with pytest.raises(RuntimeError):
+            serial.wait_next()
+
+
+def test_serial_evaluator_does_not_execute_cancelled_future():
+    event, log = threading.Event(), []
+    with SerialEvaluator() as serial:
+        serial.submit(partial(_wait_for, event))
+        queued = serial.submit(partial(_append, log=log), 1)
+        assert serial.cancel(queued)
+        assert queued is serial.wait_next()
+        event.set()
+        assert "done" == serial.wait_next().result
+    assert isinstance(queued.exception, CancelledError)
+    assert [] == log
+
+
+def test_serial_evaluator_replaces_thread_which_exceeds_hard_timeout():
+    event = threading.Event()
+    with SerialEvaluator(hard_timeout=0.5) as serial:
+        slow = serial.submit(partial(_wait_for, event))
+        serial.submit(_add, 1)
+        assert slow is serial.wait_next(poll_time=0.1)
+        assert isinstance(slow.exception, TimeoutError)
+        assert 1 == serial.wait_next().result, "The next future runs on a new thread."
+        event.set()
+    assert slow.result is None
+
+
+def test_thread_evaluator_evaluates_with_defaults():
+    with ThreadEvaluator(n_workers=2, prefetch=1, defaults=dict(y=10)) as threads:
+        assert threads.queue_depth == 3
+        for i in range(3):
+            threads.submit(_add, i)
+        results = [threads.wait_next().result for _ in range(3)]
+    assert [10, 11, 12] == sorted(results)
+
+
+def test_thread_evaluator_cancel_ignores_result_of_running_future():
+    event, started = threading.Event(), threading.Event()
+    with ThreadEvaluator(n_workers=1) as threads:
+        running = threads.submit(partial(_wait_for, event, started))
+        started.wait(5)
+        queued = threads.submit(_add, 1)
+        assert threads.cancel(queued) and threads.cancel(running)
+        assert not threads.cancel(running)
+        cancelled = [threads.wait_next(), threads.wait_next()]
+        event.set()
+        time.sleep(0.5)
+        assert [] == threads.completed_futures()
+    assert [queued, running] == cancelled
+    assert all(isinstance(f.exception, CancelledError) for f in cancelled)
+    assert running.result is None and queued.result is None
+
+
+def test_thread_evaluator_does_not_start_queued_futures_after_exit():
+    event, started, log = threading.Event(), threading.Event(), []
+    with ThreadEvaluator(n_workers=1) as threads:
+        threads.submit(partial(_wait_for, event, started))
+        for i in range(3):
+            threads.submit(partial(_append, log=log), i)
+        started.wait(5)
+    event.set()
+    time.sleep(0.5)
+    assert [] == log
+    assert {} == threads.futures
+
+
+def test_thread_evaluator_abandoned_future_does_not_modify_arguments():
+    """ Arguments are copied, as a running function can not be interrupted. """
+    event, started, log = threading.Event(), threading.Event(), []
+    with ThreadEvaluator(n_workers=1) as threads:
+        threads.submit(partial(_wait_and_append, event=event, started=started), 1, log)
+        started.wait(5)
+    event.set()
+    time.sleep(0.5)
+    assert [] == log
+
+
+def test_evaluators_can_not_be_entered_twice():
+    for evaluator in [SerialEvaluator(), ThreadEvaluator(n_workers=1)]:
+        with evaluator:
+            pass
+        with pytest.raises(RuntimeError):
+            with evaluator:
+                pass
@@ -0,0 +1,53 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from gama.utilities.generic.prediction_store import PredictionStore
+
+
+def test_prediction_store_returns_read_only_views(tmp_path):
+    """ Predictions are returned as float32 views of the mapped matrix. """
+    store = PredictionStore(str(tmp_path), capacity=2)
+    probabilities, labels = np.random.random(size=(30, 3)), np.arange(30.0)
+    probability_key = store.add(probabilities)
+
+    predictions = store.get(probability_key)
+    assert (30, 3) == predictions.shape
+    assert np.float32 == predictions.dtype
+    assert np.allclose(probabilities, predictions)
+    assert not predictions.flags.writeable
+    assert not predictions.flags.owndata, "Predictions should be a view, not a copy."
+
+    with pytest.raises(ValueError):
+        store.add(labels)
+
+
+def test_prediction_store_reuses_rows_and_grows(tmp_path):
+    """ Rows of removed predictions are reused, the matrix grows when it is full. """
+    store = PredictionStore(str(tmp_path), capacity=2)
+    first, second = store.add(np.zeros(10)), store.add(np.ones(10))
+    store.remove(first)
+    third = store.add(np.full(10, 2.0))
+    assert 2 == store.capacity, "The row of `first` should be reused."
+
+    fourth = store.add(np.full(10, 3.0))
+    assert 4 == store.capacity
+    assert first not in store and 3 == len(store)
+    for key, value in [(second, 1.0), (third, 2.0), (fourth, 3.0)]:
+        assert (10,) == store.get(key).shape
+        assert np.all(store.get(key) == value)
+
+
+def test_prediction_store_pickle_does_not_copy_matrix(tmp_path):
+    """ An unpickled store reads the predictions from the same file. """
+    store = PredictionStore(str(tmp_path))
+    predictions = np.random.random(size=(1000, 5))
+    key = store.add(predictions)
+
+    pickled = pickle.dumps(store)
+    assert len(pickled) < predictions.nbytes / 10
+    unpickled = pickle.loads(pickled)
+    assert np.allclose(predictions, unpickled.get(key))
+    with pytest.raises(RuntimeError):
+        unpickled.add(predictions)
@@ -0,0 +1,67 @@
+import multiprocessing
+import time
+import warnings
+
+from gama.utilities.generic.async_evaluator import AsyncEvaluator
+from gama.utilities.generic.remote_evaluator import RemoteEvaluator, remote_worker
+
+
+def _add_offset(x, offset):
+    return x + offset
+
+
+def _sleep_and_add_offset(x, offset):
+    time.sleep(x)
+    return x + offset
+
+
+def test_remote_evaluator_evaluates_on_localhost_worker(monkeypatch):
+    """ Futures are evaluated by a worker connected over TCP, with the defaults. """
+    monkeypatch.setattr(AsyncEvaluator, "defaults", dict(offset=10))
+    with warnings.catch_warnings():
+        # The broker must shut down without its threads raising SystemExit.
+        warnings.simplefilter("error")
+        with RemoteEvaluator(address=("127.0.0.1", 0), authkey=b"test") as remote:
+            worker = multiprocessing.Process(
+                target=remote_worker, args=(remote.address, b"test")
+            )
+            worker.start()
+            for i in range(3):
+                remote.submit(_add_offset, i)
+            results = sorted(remote.wait_next().result for _ in range(3))
+            assert 1 + 2 == remote.queue_depth
+
+    worker.join(timeout=10)
+    assert [10, 11, 12] == results
+    assert not worker.is_alive()
+
+
+def test_remote_evaluator_is_private_by_default():
+    """ The broker listens on localhost only, with a random authkey. """
+    with RemoteEvaluator() as remote, RemoteEvaluator() as other:
+        assert "127.0.0.1" == remote.address[0]
+        assert 64 == len(remote.authkey)
+        assert remote.authkey != other.authkey
+
+
+def test_remote_evaluator_resubmits_future_of_lost_worker(monkeypatch):
+    """ The future of a worker which stops sending heartbeats is evaluated again. """
+    monkeypatch.setattr(AsyncEvaluator, "defaults", dict(offset=10))
+    with RemoteEvaluator(worker_timeout=2) as remote:
+        args = (remote.address, remote.authkey)
+        lost_worker = multiprocessing.Process(target=remote_worker, args=args)
+        lost_worker.start()
+        remote.submit(_sleep_and_add_offset, 2)
+        while not remote._connected_broker._running:
+            time.sleep(0.1)
+        lost_worker.terminate()
+        lost_worker.join()
+
+        worker = multiprocessing.Process(target=remote_worker, args=args)
+        worker.start()
+        future = remote.wait_next()
+        assert future.exception is None
+        assert 12 == future.result
+
+    worker.join(timeout=10)
+    assert not worker.is_alive()
@@ -0,0 +1,76 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from gama.utilities.generic.async_evaluator import AsyncEvaluator
+from gama.utilities.generic.shared_data import SharedData, share_if_large
+
+
+def _sum_of_data(x):
+    return x.values.sum(), isinstance(x, pd.DataFrame)
+
+
+def test_shared_data_numeric_frame_is_view(tmp_path):
+    """ A DataFrame with a single dtype is loaded as a read-only view, not a copy. """
+    df = pd.DataFrame(np.arange(12, dtype=float).reshape(4, 3), columns=["a", "b", "c"])
+    shared = SharedData(df, str(tmp_path))
+    handle = pickle.loads(pickle.dumps(shared))
+    loaded = handle.load()
+
+    pd.testing.assert_frame_equal(df, loaded)
+    assert not loaded.values.flags.writeable
+    assert len(pickle.dumps(shared)) < df.memory_usage().sum() + 1000
+
+
+def test_shared_data_mixed_frame(tmp_path):
+    """ Columns of mixed dtypes (including categorical and object) are restored. """
+    df = pd.DataFrame(
+        {
+            "float": [0.5, np.nan, 1.5],
+            "int": [1, 2, 3],
+            "cat": pd.Categorical(["a", "b", "a"]),
+            "obj": ["x", "y", "z"],
+        },
+        index=[3, 1, 2],
+    )
+    loaded = SharedData(df, str(tmp_path)).load()
+    pd.testing.assert_frame_equal(df, loaded)
+    for column in ["float", "int"]:
+        values = loaded[column].values
+        assert not values.flags.owndata and not values.flags.writeable
+    assert not loaded["cat"].values.codes.flags.writeable
+
+
+def test_shared_data_series_and_ndarray(tmp_path):
+    """ Series and numpy arrays are restored including index and name. """
+    series = pd.Series([1, 0, 1], name="target")
+    pd.testing.assert_series_equal(series, SharedData(series, str(tmp_path)).load())
+
+    array = np.random.random((5, 2))
+    assert np.array_equal(array, SharedData(array, str(tmp_path)).load())
+
+
+def test_share_if_large_threshold(tmp_path):
+    """ Only data exceeding the threshold is shared, other values are untouched. """
+    df = pd.DataFrame(np.zeros((10, 10)))
+    assert share_if_large(df, str(tmp_path), threshold_mb=None) is df
+    assert share_if_large(df, str(tmp_path), threshold_mb=1) is df
+    assert share_if_large("data", str(tmp_path), threshold_mb=0) == "data"
+    assert isinstance(share_if_large(df, str(tmp_path), threshold_mb=0), SharedData)
+
+
+def test_async_evaluator_shares_defaults():
+    """ Workers of the AsyncEvaluator receive memory-mapped defaults as data. """
+    df = pd.DataFrame(np.ones((100, 5)))
+    AsyncEvaluator.defaults = dict(x=df)
+    try:
+        with AsyncEvaluator(
+            n_workers=1, logfile=None, shared_data_threshold_mb=0
+        ) as async_:
+            async_.submit(_sum_of_data)
+            future = async_.wait_next()
+    finally:
+        AsyncEvaluator.defaults = {}
+    assert future.exception is None
+    assert future.result == (500, True)